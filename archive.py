@@ -0,0 +1,139 @@
+'''
+Archive of old completed tasks
+
+Completed tasks can be moved out of the live task data into compressed
+segment files under archive/, so startup, rewrites and reports only deal
+with the tasks still in use. Each archive run writes one dated segment:
+
+    archive/tasks-YYYYMMDD-HHMMSS.txt.gz   the tasks, one tasks.txt line each
+    archive/tasks-YYYYMMDD-HHMMSS.json     a summary of the segment
+
+The summary holds the number of tasks per user and the highest task number
+in the segment. Reports add the archived tasks to the completed counts from
+the summaries alone, and new tasks are numbered after the highest archived
+number, so task numbers are never reused. Segments are never read again
+unless asked for with read_segment().
+
+A segment is written before its tasks are removed from the live data, and
+its summary is written last. A summary without a segment, or a segment
+without a summary, is left over from an interrupted run and is ignored.
+'''
+import gzip
+import json
+import os
+from datetime import datetime
+
+from locking import file_identity
+from task import Task
+
+ARCHIVE_DIR = "archive"
+
+
+class TaskArchive:
+    def __init__(self, directory = ARCHIVE_DIR):
+        '''
+        Inputs:
+        directory: String, created when the first segment is written
+        '''
+        self.directory = directory
+        # Summaries by segment name, and the directory identity they were read at
+        self._summaries = {}
+        self._identity = None
+
+    def _path(self, name, extension):
+        return os.path.join(self.directory, name + extension)
+
+    def summaries(self):
+        '''
+        Returns the summaries of every complete segment, oldest first
+        '''
+        identity = file_identity(self.directory)
+        if identity != self._identity:
+            summaries = {}
+            names = sorted(os.listdir(self.directory)) if identity is not None else []
+            for file_name in names:
+                if not file_name.endswith(".json"):
+                    continue
+                name = file_name[:-len(".json")]
+                if name in self._summaries:
+                    summaries[name] = self._summaries[name]
+                elif os.path.exists(self._path(name, ".txt.gz")):
+                    with open(self._path(name, ".json"), "r") as summary_file:
+                        summaries[name] = json.load(summary_file)
+            self._summaries = summaries
+            self._identity = identity
+        return list(self._summaries.values())
+
+    def completed_counts(self):
+        '''
+        Returns (total, per_user) numbers of archived tasks, all of them completed
+        '''
+        total = 0
+        per_user = {}
+        for summary in self.summaries():
+            total += summary["tasks"]
+            for username, count in summary["users"].items():
+                per_user[username] = per_user.get(username, 0) + count
+        return total, per_user
+
+    def next_task_number(self):
+        '''
+        Lowest task number above every archived task
+        '''
+        return max((summary["last_task_number"] + 1 for summary in self.summaries()), default=0)
+
+    def write_segment(self, tasks, now = None):
+        '''
+        Writes tasks to a new segment with its summary and returns the
+        segment's name
+        '''
+        if now is None:
+            now = datetime.now()
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"tasks-{now:%Y%m%d-%H%M%S}"
+        suffix = 1
+        while os.path.exists(self._path(name, ".txt.gz")) or os.path.exists(self._path(name, ".json")):
+            name = f"tasks-{now:%Y%m%d-%H%M%S}-{suffix}"
+            suffix += 1
+
+        users = {}
+        for task in tasks:
+            users[task.username] = users.get(task.username, 0) + 1
+        summary = {
+            "created": now.isoformat(timespec="seconds"),
+            "tasks": len(tasks),
+            "first_task_number": min(int(t.task_number) for t in tasks),
+            "last_task_number": max(int(t.task_number) for t in tasks),
+            "first_due_date": min(t.due_date for t in tasks).isoformat(),
+            "last_due_date": max(t.due_date for t in tasks).isoformat(),
+            "users": users,
+        }
+
+        # Each file is written under a temporary name, synced and renamed,
+        # the summary last so it only appears once the segment is complete
+        segment_path = self._path(name, ".txt.gz")
+        with gzip.open(segment_path + ".tmp", "wt", encoding="utf-8") as segment_file:
+            segment_file.write("\n".join(t.to_string() for t in tasks))
+        _sync_and_rename(segment_path + ".tmp", segment_path)
+
+        summary_path = self._path(name, ".json")
+        with open(summary_path + ".tmp", "w") as summary_file:
+            json.dump(summary, summary_file, indent=2)
+        _sync_and_rename(summary_path + ".tmp", summary_path)
+        return name
+
+    def read_segment(self, name):
+        '''
+        Yields the Task objects stored in a segment
+        '''
+        with gzip.open(self._path(name, ".txt.gz"), "rt", encoding="utf-8") as segment_file:
+            for line in segment_file:
+                line = line.rstrip("\n")
+                if line != "":
+                    yield Task.from_string(line)
+
+
+def _sync_and_rename(tmp_path, path):
+    with open(tmp_path, "rb") as written_file:
+        os.fsync(written_file.fileno())
+    os.replace(tmp_path, path)
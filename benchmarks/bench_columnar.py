@@ -0,0 +1,56 @@
+'''
+Benchmark for the NumPy report engine in columnar.py
+
+Generates task files of growing size and times writing the overview files
+from a fresh start with the pure Python engine (loading every task) and with
+the numpy engine, checking that both write exactly the same files.
+
+Run from the repository root (needs NumPy):
+    python benchmarks/bench_columnar.py [--sizes 100000,1000000,3000000] [--users 50000]
+'''
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import columnar
+import report
+import storage
+import synthetic
+from manager import TaskManager
+
+
+def timed_report(engine):
+    start = time.perf_counter()
+    manager = TaskManager(storage.FlatFileBackend(), engine)
+    manager.generate_report()
+    elapsed = time.perf_counter() - start
+    with open(report.TASK_OVERVIEW_FILE) as t_o_file, open(report.USER_OVERVIEW_FILE) as u_o_file:
+        files = t_o_file.read(), u_o_file.read()
+    return elapsed, files
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="100000,1000000", help="comma separated task counts")
+    parser.add_argument("--users", type=int, default=10000)
+    args = parser.parse_args()
+    if not columnar.available():
+        sys.exit("NumPy is not installed")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.chdir(data_dir)
+        for size in [int(size) for size in args.sizes.split(",")]:
+            synthetic.generate(data_dir, size, args.users)
+            python_time, python_files = timed_report("python")
+            numpy_time, numpy_files = timed_report("numpy")
+            same = "identical" if python_files == numpy_files else "DIFFERENT"
+            print(f"{size:>9} tasks  python {python_time:7.2f} s  numpy {numpy_time:7.2f} s  "
+                  f"{python_time / numpy_time:5.1f}x  files {same}")
+        os.chdir("/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+'''
+Scaling benchmark for the parallel report counts in sharded.py
+
+Generates task files of growing size and times counting them with a growing
+number of worker processes, for each report engine, checking the counts
+against the single process report. Speedups are relative to one worker
+with the same engine, and cannot go past the number of CPUs.
+
+Run from the repository root:
+    python benchmarks/bench_parallel_report.py [--sizes 1000000,3000000] [--workers 1,2,4,8]
+'''
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import columnar
+import sharded
+import storage
+import synthetic
+from manager import TaskManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1000000", help="comma separated task counts")
+    parser.add_argument("--workers", default=None, help="comma separated worker counts, defaults to powers of two up to the number of CPUs")
+    parser.add_argument("--users", type=int, default=10000)
+    args = parser.parse_args()
+
+    if args.workers is None:
+        cpus = os.cpu_count() or 1
+        worker_counts = [1 << i for i in range(cpus.bit_length()) if 1 << i <= cpus]
+        if worker_counts[-1] != cpus:
+            worker_counts.append(cpus)
+    else:
+        worker_counts = [int(workers) for workers in args.workers.split(",")]
+    engines = ["python", "numpy"] if columnar.available() else ["python"]
+    print(f"{os.cpu_count()} CPUs")
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.chdir(data_dir)
+        for size in [int(size) for size in args.sizes.split(",")]:
+            synthetic.generate(data_dir, size, args.users)
+            backend = storage.FlatFileBackend()
+            start = time.perf_counter()
+            expected = TaskManager(backend, "python", report_workers=1).report_counts()
+            print(f"\n{size} tasks, single process report with every task loaded: {time.perf_counter() - start:.2f} s")
+            backend.close()
+
+            print(f"{'engine':>7} {'workers':>8} {'time':>9} {'speedup':>8}  counts")
+            for engine in engines:
+                single = None
+                for workers in worker_counts:
+                    start = time.perf_counter()
+                    counts = sharded.report_counts(storage.FlatFileBackend(), None, workers, engine)
+                    elapsed = time.perf_counter() - start
+                    if single is None:
+                        single = elapsed
+                    same = "identical" if counts == expected else "DIFFERENT"
+                    print(f"{engine:>7} {workers:>8} {elapsed:>7.2f} s {single / elapsed:>7.1f}x  {same}")
+        os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+'''
+Benchmark for task updates against the size of tasks.txt
+
+Times, per update, at growing file sizes:
+
+    due date, patched     a due date edit written over its line in place
+    complete, rewrite     completing a task when not journaling, which
+                          changes the line length and rewrites tasks.txt
+    complete, journal     completing a task with the journal (the default)
+
+Run from the repository root:
+    python benchmarks/bench_patch.py [--sizes 10000,100000,1000000] [--updates 50]
+'''
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import storage
+import synthetic
+from manager import TaskManager
+
+
+def time_updates(data_dir, work_dir, journal_mode, update, updates):
+    for name in os.listdir(work_dir):
+        os.remove(os.path.join(work_dir, name))
+    for name in (storage.TASKS_FILE, storage.USERS_FILE):
+        shutil.copy(os.path.join(data_dir, name), work_dir)
+
+    manager = TaskManager(storage.FlatFileBackend(journal_mode=journal_mode))
+    rng = random.Random(1)
+    numbers = rng.sample([t.task_number for t in manager.store.with_status(False)], updates + 1)
+    # The first update builds the line index, so it is left out of the timing
+    update(manager, numbers.pop())
+    start = time.perf_counter()
+    for task_number in numbers:
+        update(manager, task_number)
+    elapsed = (time.perf_counter() - start) / updates
+    manager.close()
+    return elapsed
+
+def edit_due_date(manager, task_number):
+    task = manager.get_task(task_number)
+    manager.edit_task(task_number, due_date=task.due_date + timedelta(days=1))
+
+def complete(manager, task_number):
+    manager.complete_task(task_number)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma separated task counts")
+    parser.add_argument("--updates", type=int, default=50, help="updates timed per measurement")
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as data_dir, tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)
+        print(f"{'tasks':>9} {'file MiB':>9} {'due date, patched':>19} {'complete, rewrite':>19} {'complete, journal':>19}")
+        for size in [int(size) for size in args.sizes.split(",")]:
+            synthetic.generate(data_dir, size, max(10, size // 20))
+            file_size = os.path.getsize(os.path.join(data_dir, storage.TASKS_FILE))
+            patched = time_updates(data_dir, work_dir, False, edit_due_date, args.updates)
+            rewrite = time_updates(data_dir, work_dir, False, complete, args.updates)
+            journal = time_updates(data_dir, work_dir, True, complete, args.updates)
+            print(f"{size:>9} {file_size / 2**20:>9.1f} {patched * 1000:>16.3f} ms "
+                  f"{rewrite * 1000:>16.3f} ms {journal * 1000:>16.3f} ms")
+        os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+'''
+Benchmark for generating the overview files as the "gr" menu option does
+
+Times TaskManager.generate_report() on generated tasks.txt and user.txt
+files while growing the number of tasks with a fixed number of users, then
+while growing the number of users with a fixed number of tasks. Loading the
+tasks, which a fresh start does first, is timed separately from the report
+itself. The time per task (or per user) should stay roughly flat if both
+scale linearly.
+
+Run from the repository root:
+    python benchmarks/bench_report.py
+'''
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import storage
+import synthetic
+from manager import TaskManager
+
+
+def time_report(data_dir, num_tasks, num_users):
+    '''
+    Returns the seconds taken to load the tasks and to generate the report
+    '''
+    synthetic.generate(data_dir, num_tasks, num_users)
+    start = time.perf_counter()
+    manager = TaskManager(storage.FlatFileBackend(snapshot_mode = False), "python", report_workers = 1)
+    manager.store
+    loaded = time.perf_counter()
+    manager.generate_report()
+    elapsed = time.perf_counter()
+    manager.close()
+    return loaded - start, elapsed - loaded
+
+def main():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as data_dir:
+        # The overview files and rollups are written here
+        os.chdir(data_dir)
+
+        print("Scaling in task count (1,000 users)")
+        for num_tasks in (25_000, 50_000, 100_000, 200_000):
+            load_time, report_time = time_report(data_dir, num_tasks, 1000)
+            print(f"  {num_tasks:>8} tasks: load {load_time:8.3f} s  {load_time / num_tasks * 1e6:6.2f} us/task"
+                  f"  report {report_time:8.3f} s")
+
+        print("Scaling in user count (200,000 tasks)")
+        for num_users in (500, 1000, 2000, 4000):
+            load_time, report_time = time_report(data_dir, 200_000, num_users)
+            print(f"  {num_users:>8} users: load {load_time:8.3f} s  report {report_time:8.3f} s"
+                  f"  {report_time / num_users * 1e6:6.2f} us/user")
+        os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
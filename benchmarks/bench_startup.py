@@ -0,0 +1,81 @@
+'''
+Benchmark for startup time with and without snapshots
+
+Times new processes that import the task manager and load every task and
+user, from process start to exit, at growing file sizes:
+
+    parse       parsing tasks.txt and user.txt (TASK_MANAGER_SNAPSHOT=0)
+    first run   parsing and writing the snapshots, when they are missing
+    snapshot    loading the snapshots written by the first run
+
+The time an empty Python process takes is shown for comparison.
+
+Run from the repository root:
+    python benchmarks/bench_startup.py [--sizes 10000,100000,1000000] [--repeat 3]
+'''
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import snapshot
+import storage
+import synthetic
+
+# Run in the child process, in the data directory. Only what a start of the
+# task manager needs is imported.
+CHILD = f'''
+import sys
+sys.path.insert(0, {os.path.abspath(ROOT)!r})
+import storage, task_manager
+manager = task_manager.TaskManager(storage.FlatFileBackend(snapshot_mode=sys.argv[1] == "snapshot"))
+manager.store
+manager.users
+'''
+
+
+def timed_start(data_dir, mode):
+    # The whole child process is timed, imports and interpreter start included
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", CHILD, mode], cwd=data_dir, check=True)
+    return time.perf_counter() - start
+
+def empty_start():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return time.perf_counter() - start
+
+def remove_snapshots(data_dir):
+    for name in (storage.TASKS_FILE, storage.USERS_FILE):
+        path = snapshot.snapshot_path(os.path.join(data_dir, name))
+        if os.path.exists(path):
+            os.remove(path)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma separated task counts")
+    parser.add_argument("--repeat", type=int, default=3, help="starts timed per measurement, the fastest is shown")
+    args = parser.parse_args()
+
+    print(f"empty Python process: {min(empty_start() for _ in range(args.repeat)):.3f} s")
+    with tempfile.TemporaryDirectory() as data_dir:
+        print(f"{'tasks':>9} {'file MiB':>9} {'snapshot MiB':>13} {'parse':>9} {'first run':>10} {'snapshot':>9} {'speedup':>8}")
+        for size in [int(size) for size in args.sizes.split(",")]:
+            synthetic.generate(data_dir, size, max(10, size // 20))
+            remove_snapshots(data_dir)
+            parse = min(timed_start(data_dir, "parse") for _ in range(args.repeat))
+            first_run = timed_start(data_dir, "snapshot")
+            loaded = min(timed_start(data_dir, "snapshot") for _ in range(args.repeat))
+            file_size = os.path.getsize(os.path.join(data_dir, storage.TASKS_FILE))
+            snapshot_size = os.path.getsize(snapshot.snapshot_path(os.path.join(data_dir, storage.TASKS_FILE)))
+            print(f"{size:>9} {file_size / 2**20:>9.1f} {snapshot_size / 2**20:>13.1f} {parse:>7.3f} s "
+                  f"{first_run:>8.3f} s {loaded:>7.3f} s {parse / loaded:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+'''
+Benchmark suite for the main operations at growing data sizes
+
+For each size synthetic tasks.txt and user.txt files are generated (see
+synthetic.py) and these operations are measured on a fresh copy:
+
+    parse            Task.from_string on every line of tasks.txt
+    load             TaskManager startup, loading the store
+    add_task         adding tasks one at a time, each stored on disk
+    view_mine        a user's tasks rendered as in the "vm" menu
+    complete         marking tasks complete as with "mc"
+    generate_report  writing task_overview.txt and user_overview.txt
+
+Each operation reports its time and, unless --no-memory is given, the peak
+memory it allocated, measured with tracemalloc in a second run because
+tracing slows allocation down. Results are saved as JSON, and --compare
+prints the change against an earlier results file.
+
+Run from the repository root:
+    python benchmarks/bench_suite.py [--sizes 1000,10000,100000] [--output results.json]
+    python benchmarks/bench_suite.py --sizes 1000000 --users 50000 --compare results.json
+'''
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import storage
+import synthetic
+import task_manager
+from manager import TaskManager
+from task import Task
+
+# Times add_task, view_mine and complete are done per measurement
+REPEAT = 100
+
+
+def open_manager():
+    manager = TaskManager(storage.FlatFileBackend())
+    manager.store
+    return manager
+
+def op_parse(users, rng):
+    def run():
+        with open(storage.TASKS_FILE, "r") as task_file:
+            return [Task.from_string(line.rstrip("\n")) for line in task_file if line.strip()]
+    return None, run, 1
+
+def op_load(users, rng):
+    def run():
+        return open_manager()
+    return None, run, 1
+
+def op_add_task(users, rng):
+    manager = open_manager()
+    assignees = [rng.choice(users) for _ in range(REPEAT)]
+    def run():
+        for username in assignees:
+            manager.add_task(username, "Benchmark", "Added by the benchmark", "2030-01-01")
+    return manager, run, REPEAT
+
+def op_view_mine(users, rng):
+    manager = open_manager()
+    viewers = [rng.choice(users) for _ in range(REPEAT)]
+    def run():
+        # The first page, as browse() shows it
+        out = io.StringIO()
+        for username in viewers:
+            page, total = manager.list_tasks(username, limit=task_manager.PAGE_SIZE)
+            out.write(task_manager.render_page(page))
+        return out
+    return manager, run, REPEAT
+
+def op_complete(users, rng):
+    manager = open_manager()
+    incomplete = [t.task_number for t in manager.store.with_status(False)]
+    numbers = rng.sample(incomplete, min(REPEAT, len(incomplete)))
+    def run():
+        for task_number in numbers:
+            manager.complete_task(task_number)
+    return manager, run, len(numbers)
+
+def op_generate_report(users, rng):
+    manager = open_manager()
+    def run():
+        return manager.generate_report()
+    return manager, run, 1
+
+OPERATIONS = {
+    "parse": op_parse,
+    "load": op_load,
+    "add_task": op_add_task,
+    "view_mine": op_view_mine,
+    "complete": op_complete,
+    "generate_report": op_generate_report,
+}
+
+
+def measure(operation, data_dir, work_dir, users, memory):
+    '''
+    Runs one operation on a fresh copy of the data
+
+    Returns (seconds, number of operations, peak bytes or None).
+    '''
+    def fresh():
+        for name in os.listdir(work_dir):
+            os.remove(os.path.join(work_dir, name))
+        for name in (storage.TASKS_FILE, storage.USERS_FILE):
+            shutil.copy(os.path.join(data_dir, name), work_dir)
+        return OPERATIONS[operation](users, random.Random(1))
+
+    manager, run, count = fresh()
+    start = time.perf_counter()
+    result = run()
+    seconds = time.perf_counter() - start
+    del result
+    if manager is not None:
+        manager.close()
+
+    peak = None
+    if memory:
+        manager, run, _ = fresh()
+        tracemalloc.start()
+        result = run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del result
+        if manager is not None:
+            manager.close()
+    return seconds, count, peak
+
+def run_suite(sizes, num_users, completed, overdue, operations, memory):
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as data_dir, tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)
+        try:
+            for size in sizes:
+                users = num_users or min(50000, max(10, size // 20))
+                names = synthetic.generate(data_dir, size, users, completed, overdue)
+                for operation in operations:
+                    seconds, count, peak = measure(operation, data_dir, work_dir, names, memory)
+                    result = {
+                        "tasks": size,
+                        "users": users,
+                        "operation": operation,
+                        "count": count,
+                        "seconds": seconds,
+                        "seconds_per_op": seconds / count if count else None,
+                        "peak_bytes": peak,
+                    }
+                    results.append(result)
+                    print(format_result(result), flush=True)
+        finally:
+            os.chdir(cwd)
+    return results
+
+def format_result(result, previous = None):
+    line = (f"{result['tasks']:>8} tasks {result['users']:>6} users  {result['operation']:<16}"
+            f"{result['seconds_per_op'] * 1000:>10.3f} ms/op")
+    if result["peak_bytes"] is not None:
+        line += f"  peak {result['peak_bytes'] / 2**20:8.1f} MiB"
+    if previous is not None:
+        change = result["seconds_per_op"] / previous["seconds_per_op"] - 1
+        line += f"  {change:+7.1%} vs previous"
+    return line
+
+def compare(results, path):
+    with open(path, "r") as previous_file:
+        previous = {
+            (r["tasks"], r["users"], r["operation"]): r
+            for r in json.load(previous_file)["results"]
+        }
+    print(f"\nCompared with {path}:")
+    for result in results:
+        match = previous.get((result["tasks"], result["users"], result["operation"]))
+        if match is not None and match["seconds_per_op"]:
+            print(format_result(result, match))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma separated task counts")
+    parser.add_argument("--users", type=int, default=0, help="number of users, by default tasks / 20 between 10 and 50000")
+    parser.add_argument("--completed", type=float, default=0.4, help="share of completed tasks")
+    parser.add_argument("--overdue", type=float, default=0.2, help="share of incomplete, overdue tasks")
+    parser.add_argument("--operations", default=",".join(OPERATIONS), help="comma separated operations to run")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--output", default="bench_results.json", help="JSON file to save the results to")
+    parser.add_argument("--compare", help="earlier results file to compare with")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    operations = args.operations.split(",")
+    for operation in operations:
+        if operation not in OPERATIONS:
+            parser.error(f"unknown operation '{operation}', choose from: {', '.join(OPERATIONS)}")
+
+    results = run_suite(sizes, args.users, args.completed, args.overdue, operations, not args.no_memory)
+    with open(args.output, "w") as out_file:
+        json.dump({
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": vars(args),
+            "results": results,
+        }, out_file, indent=2)
+    print(f"Saved results to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
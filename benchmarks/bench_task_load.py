@@ -0,0 +1,103 @@
+'''
+Benchmark for loading tasks.txt lines into Task objects
+
+Compares the previous Task (a __dict__ object parsing both dates with
+strptime on load) with the current __slots__ Task that parses dates lazily.
+Reports load time and the memory held by the loaded tasks, then the cost of
+touching every due date afterwards.
+
+Run from the repository root:
+    python benchmarks/bench_task_load.py [num_tasks]
+'''
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from task import Task, DATETIME_STRING_FORMAT
+
+
+class DictTask:
+    '''
+    The Task class as it was before it used __slots__ and lazy dates
+    '''
+    def __init__(self, username = None, title = None, description = None, due_date = None, assigned_date = None, completed = None, task_number = None):
+        self.username = username
+        self.title = title
+        self.description = description
+        self.due_date = due_date
+        self.assigned_date = assigned_date
+        self.completed = completed
+        self.task_number = task_number
+
+    def from_string(self, task_str):
+        tasks = task_str.split(";")
+        due_date = datetime.strptime(tasks[3], DATETIME_STRING_FORMAT)
+        assigned_date = datetime.strptime(tasks[4], DATETIME_STRING_FORMAT)
+        completed = True if tasks[5] == "Yes" else False
+        self.__init__(tasks[0], tasks[1], tasks[2], due_date, assigned_date, completed, tasks[6])
+
+
+def make_lines(num_tasks):
+    rng = random.Random(num_tasks)
+    today = date.today()
+    lines = []
+    for n in range(num_tasks):
+        due = today + timedelta(days=rng.randint(-90, 90))
+        assigned = due - timedelta(days=rng.randint(1, 60))
+        lines.append(";".join([
+            f"user{rng.randint(0, 999)}",
+            f"Task {n}",
+            "Description of the task",
+            due.isoformat(),
+            assigned.isoformat(),
+            "Yes" if rng.random() < 0.4 else "No",
+            str(n),
+        ]))
+    return lines
+
+def load_old(lines):
+    tasks = []
+    for line in lines:
+        t = DictTask()
+        t.from_string(line)
+        tasks.append(t)
+    return tasks
+
+def load_new(lines):
+    return [Task.from_string(line) for line in lines]
+
+def measure(label, load, lines):
+    # Timed separately because tracemalloc slows allocation down
+    start = time.perf_counter()
+    tasks = load(lines)
+    elapsed = time.perf_counter() - start
+    del tasks
+
+    tracemalloc.start()
+    tasks = load(lines)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for t in tasks:
+        t.due_date
+    touch = time.perf_counter() - start
+
+    print(f"{label:<28} load {elapsed:7.3f} s   held {current / 2**20:8.1f} MiB   "
+          f"peak {peak / 2**20:8.1f} MiB   read all due dates {touch:6.3f} s")
+
+def main():
+    num_tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    lines = make_lines(num_tasks)
+    print(f"{num_tasks} tasks")
+    measure("before (__dict__, strptime)", load_old, lines)
+    measure("after (__slots__, lazy)", load_new, lines)
+
+
+if __name__ == "__main__":
+    main()
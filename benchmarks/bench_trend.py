@@ -0,0 +1,76 @@
+'''
+Benchmark for trend queries over the daily rollups in rollup.py
+
+Records years of daily rollups for many users, then times 90 day trends
+for all tasks and for one user, reading only the rollups, against a single
+report over the tasks, which a trend without rollups would need once for
+every day.
+
+Run from the repository root:
+    python benchmarks/bench_trend.py [--tasks 1000000] [--users 1000] [--history 730]
+'''
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import storage
+import synthetic
+from manager import TaskManager
+from rollup import RollupLog
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--history", type=int, default=730, help="days of rollups recorded")
+    parser.add_argument("--days", type=int, default=90, help="days in each trend")
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.chdir(data_dir)
+        usernames = synthetic.generate(data_dir, args.tasks, args.users)
+
+        start = time.perf_counter()
+        manager = TaskManager(storage.FlatFileBackend(), report_workers=1)
+        counts = manager.report_counts()
+        report_time = time.perf_counter() - start
+        manager.close()
+
+        # Each day's rollups are the current counts with some noise
+        rng = random.Random(1)
+        log = RollupLog()
+        today = date.today()
+        totals, per_user = counts
+        start = time.perf_counter()
+        for day in range(args.history - 1, -1, -1):
+            day_counts = {u: [max(0, n + rng.randint(-2, 2)) for n in c] for u, c in per_user.items()}
+            log.record(today - timedelta(days=day), totals, day_counts)
+        record_time = (time.perf_counter() - start) / args.history
+
+        manager = TaskManager(storage.FlatFileBackend())
+        start = time.perf_counter()
+        total_trend = manager.trend(args.days)
+        total_time = time.perf_counter() - start
+        start = time.perf_counter()
+        user_trend = manager.trend(args.days, usernames[-1])
+        user_time = time.perf_counter() - start
+
+        print(f"{args.tasks} tasks, {args.users} users, {args.history} days of rollups "
+              f"({os.path.getsize(log.path) / 2**20:.1f} MiB)")
+        print(f"report over every task:          {report_time:8.3f} s, {report_time * args.days:8.1f} s for {args.days} days")
+        print(f"recording one day's rollup:      {record_time * 1000:8.3f} ms")
+        print(f"{args.days} day trend, all tasks:      {total_time * 1000:8.3f} ms ({len(total_trend)} days)")
+        print(f"{args.days} day trend, one user:       {user_time * 1000:8.3f} ms ({len(user_trend)} days)")
+        os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
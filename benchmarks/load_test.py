@@ -0,0 +1,161 @@
+'''
+Load test for the JSON API server in server.py
+
+Opens a number of keep-alive connections and sends requests on all of them
+at once for a fixed time, then reports requests per second and latency
+percentiles for reads and writes.
+
+Without --port a server is started in another process on a temporary copy
+of generated data. Reads ask for one user's tasks, writes add a task.
+
+Run from the repository root:
+    python benchmarks/load_test.py [--connections 50] [--duration 5] [--write-ratio 0.05]
+    python benchmarks/load_test.py --port 8000 --user admin --password password
+'''
+import argparse
+import asyncio
+import base64
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import storage
+from manager import TaskManager
+from task import Task
+
+
+def prepare_data(data_dir, tasks, users):
+    os.chdir(data_dir)
+    backend = storage.FlatFileBackend()
+    names = ["admin"] + [f"user{n}" for n in range(users - 1)]
+    backend.write_users_to_file({name: "password" for name in names})
+    backend.write_tasks_to_file(
+        Task.from_fields(names[n % users], f"title {n}", "generated", "2030-01-01", "2024-01-01", n % 3 == 0, str(n))
+        for n in range(tasks)
+    )
+    return names
+
+def run_server(data_dir, port):
+    import server
+    os.chdir(data_dir)
+    server.run(TaskManager(storage.FlatFileBackend()), "127.0.0.1", port)
+
+async def wait_for_port(port, timeout = 30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+async def request(reader, writer, method, path, auth, body = b""):
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Authorization: Basic {auth}\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1")
+        + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+async def client(port, auth, users, write_ratio, deadline, reads, writes, errors):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps({"title": "load test", "description": "load test", "due_date": "2030-01-01"}).encode()
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            if random.random() < write_ratio:
+                status = await request(reader, writer, "POST", "/tasks", auth, body)
+                latencies = writes
+            else:
+                user = random.choice(users)
+                status = await request(reader, writer, "GET", f"/users/{user}/tasks", auth)
+                latencies = reads
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                errors.append(status)
+    finally:
+        writer.close()
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def summary(name, latencies, elapsed):
+    if not latencies:
+        return f"{name:>6}: none"
+    return (f"{name:>6}: {len(latencies):>7} requests {len(latencies) / elapsed:>9.0f} req/s  "
+            f"p50 {percentile(latencies, 0.50) * 1000:6.2f} ms  "
+            f"p95 {percentile(latencies, 0.95) * 1000:6.2f} ms  "
+            f"p99 {percentile(latencies, 0.99) * 1000:6.2f} ms")
+
+async def load(args, users):
+    await wait_for_port(args.port)
+    auth = base64.b64encode(f"{args.user}:{args.password}".encode()).decode()
+    reads, writes, errors = [], [], []
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*[
+        client(args.port, auth, users, args.write_ratio, deadline, reads, writes, errors)
+        for _ in range(args.connections)
+    ])
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.connections} connections for {elapsed:.1f} s, write ratio {args.write_ratio}")
+    print(summary("all", reads + writes, elapsed))
+    print(summary("reads", reads, elapsed))
+    print(summary("writes", writes, elapsed))
+    if errors:
+        print(f"{len(errors)} error responses")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, help="port of a running server, otherwise one is started")
+    parser.add_argument("--user", default="admin")
+    parser.add_argument("--password", default="password")
+    parser.add_argument("--connections", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds")
+    parser.add_argument("--write-ratio", type=float, default=0.05, help="fraction of requests that add a task")
+    parser.add_argument("--tasks", type=int, default=10000, help="tasks in the generated data")
+    parser.add_argument("--users", type=int, default=100, help="users in the generated data")
+    args = parser.parse_args()
+
+    if args.port is not None:
+        users = [args.user]
+        asyncio.run(load(args, users))
+        return
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        users = prepare_data(data_dir, args.tasks, args.users)
+        args.port = 8765
+        process = multiprocessing.Process(target=run_server, args=(data_dir, args.port))
+        process.start()
+        try:
+            asyncio.run(load(args, users))
+        finally:
+            process.terminate()
+            process.join()
+            os.chdir("/")
+
+
+if __name__ == "__main__":
+    main()
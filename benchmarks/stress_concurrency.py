@@ -0,0 +1,102 @@
+'''
+Stress test for several processes sharing the same task data
+
+Starts N writer processes that each add tasks and mark them complete, plus
+reader processes that keep generating report counts at the same time. It
+then checks that no update was lost: every task is present once, task numbers
+are unique and contiguous, and every task is complete.
+
+Run from the repository root:
+    python benchmarks/stress_concurrency.py [--processes 8] [--iterations 50] [--backend flat]
+'''
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import storage
+from manager import TaskManager
+
+
+def writer(data_dir, backend_name, worker_id, iterations):
+    os.chdir(data_dir)
+    manager = TaskManager(storage.open_backend(backend_name))
+    for i in range(iterations):
+        task = manager.add_task("admin", f"worker{worker_id}-{i}", "stress test", "2030-01-01")
+        manager.complete_task(task.task_number)
+    manager.close()
+
+def reader(data_dir, backend_name, iterations):
+    os.chdir(data_dir)
+    manager = TaskManager(storage.open_backend(backend_name))
+    for _ in range(iterations):
+        manager.report_counts()
+        manager.tasks_for_user("admin")
+    manager.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--processes", type=int, default=8, help="number of writer processes")
+    parser.add_argument("--readers", type=int, default=2, help="number of reader processes")
+    parser.add_argument("--iterations", type=int, default=50, help="tasks added and completed per writer")
+    parser.add_argument("--backend", choices=storage.BACKENDS, default="flat")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.chdir(data_dir)
+        # Creates the default admin account
+        setup = TaskManager(storage.open_backend(args.backend))
+        setup.users
+        setup.close()
+
+        processes = [
+            multiprocessing.Process(target=writer, args=(data_dir, args.backend, n, args.iterations))
+            for n in range(args.processes)
+        ]
+        processes += [
+            multiprocessing.Process(target=reader, args=(data_dir, args.backend, args.iterations))
+            for _ in range(args.readers)
+        ]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        failed = [p.exitcode for p in processes if p.exitcode != 0]
+        check = TaskManager(storage.open_backend(args.backend))
+        tasks = list(check.all_tasks())
+        check.close()
+        os.chdir("/")
+
+    expected = args.processes * args.iterations
+    numbers = sorted(int(t.task_number) for t in tasks)
+    titles = {t.title for t in tasks}
+    problems = []
+    if failed:
+        problems.append(f"{len(failed)} processes failed")
+    if len(tasks) != expected:
+        problems.append(f"expected {expected} tasks, found {len(tasks)}")
+    if numbers != list(range(len(tasks))):
+        problems.append("task numbers are not unique and contiguous")
+    if len(titles) != len(tasks):
+        problems.append("some tasks were stored twice")
+    if not all(t.completed for t in tasks):
+        problems.append(f"{sum(not t.completed for t in tasks)} completions were lost")
+
+    operations = expected * 2
+    print(f"{args.processes} writers, {args.readers} readers, {args.backend} backend: "
+          f"{operations} writes in {elapsed:.2f} s ({operations / elapsed:.0f} writes/s)")
+    if problems:
+        print("FAILED: " + "; ".join(problems))
+        sys.exit(1)
+    print("OK: no lost updates")
+
+
+if __name__ == "__main__":
+    main()
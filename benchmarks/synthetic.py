@@ -0,0 +1,91 @@
+'''
+Generates synthetic tasks.txt and user.txt files for benchmarks
+
+The files are written in the same format as the task manager, with a chosen
+number of tasks and users and a chosen share of completed and overdue tasks.
+The same arguments and seed always give the same files.
+
+Run from the repository root to write the files into a directory:
+    python benchmarks/synthetic.py DIRECTORY [--tasks 100000] [--users 1000] [--completed 0.4] [--overdue 0.2]
+'''
+import argparse
+import os
+import random
+from datetime import date, timedelta
+
+USER_PASSWORD = "password"
+
+DESCRIPTIONS = [
+    "Follow up with the client",
+    "Prepare the monthly figures for review",
+    "Update the documentation",
+    "Fix the reported problem and let the reporter know",
+    "Check the backups",
+]
+
+
+def usernames(num_users):
+    '''
+    Returns the generated usernames, admin first
+    '''
+    return ["admin"] + [f"user{n}" for n in range(1, num_users)]
+
+def generate(directory, num_tasks, num_users, completed = 0.4, overdue = 0.2, seed = 0, today = None):
+    '''
+    Writes tasks.txt and user.txt into a directory
+
+    Inputs:
+    completed: share of tasks that are complete
+    overdue: share of tasks that are incomplete and past their due date,
+    at most 1 - completed
+    Returns the list of usernames.
+    '''
+    if completed + overdue > 1:
+        raise ValueError("completed and overdue shares add up to more than 1")
+    if today is None:
+        today = date.today()
+    rng = random.Random(seed)
+    names = usernames(num_users)
+
+    with open(os.path.join(directory, "user.txt"), "w") as user_file:
+        user_file.write("\n".join(f"{name};{USER_PASSWORD}" for name in names))
+
+    # Dates are formatted once and picked from these lists
+    past = [(today - timedelta(days=d)).isoformat() for d in range(1, 366)]
+    future = [(today + timedelta(days=d)).isoformat() for d in range(0, 366)]
+    assigned = [(today - timedelta(days=d)).isoformat() for d in range(0, 731)]
+
+    with open(os.path.join(directory, "tasks.txt"), "w") as task_file:
+        lines = []
+        for n in range(num_tasks):
+            share = rng.random()
+            if share < completed:
+                status, due = "Yes", rng.choice(past if rng.random() < 0.5 else future)
+            elif share < completed + overdue:
+                status, due = "No", rng.choice(past)
+            else:
+                status, due = "No", rng.choice(future)
+            lines.append(f"{rng.choice(names)};Task {n};{rng.choice(DESCRIPTIONS)};"
+                         f"{due};{rng.choice(assigned)};{status};{n}")
+            if len(lines) == 10000:
+                task_file.write(("\n" if n >= 10000 else "") + "\n".join(lines))
+                lines = []
+        if lines:
+            task_file.write(("\n" if num_tasks > len(lines) else "") + "\n".join(lines))
+    return names
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("directory")
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--completed", type=float, default=0.4, help="share of completed tasks")
+    parser.add_argument("--overdue", type=float, default=0.2, help="share of incomplete, overdue tasks")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate(args.directory, args.tasks, args.users, args.completed, args.overdue, args.seed)
+    print(f"Wrote {args.tasks} tasks and {args.users} users to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
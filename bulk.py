@@ -0,0 +1,165 @@
+'''
+Bulk import and export of tasks as CSV or JSON Lines
+
+Both formats use the fields in FIELDS. On import the task_number field is
+ignored and new task numbers are assigned, assigned_date defaults to today and
+completed defaults to No. Every record is validated before anything is stored,
+and the valid import is then stored with a single write. Exports stream one
+task at a time.
+'''
+import csv
+import json
+from datetime import date
+
+from manager import check_storable
+from task import Task, parse_date
+
+FIELDS = ["task_number", "username", "title", "description", "due_date", "assigned_date", "completed"]
+
+FORMATS = ("csv", "jsonl")
+
+# Values accepted as a completed task on import
+TRUE_VALUES = {"yes", "true", "1"}
+FALSE_VALUES = {"no", "false", "0", ""}
+
+
+def format_for_path(path):
+    '''
+    Guesses the format from a file extension, defaulting to csv
+    '''
+    if path.lower().endswith((".jsonl", ".json")):
+        return "jsonl"
+    return "csv"
+
+def read_records(stream, fmt):
+    '''
+    Yields one record per row of a CSV stream or line of a JSON Lines stream
+
+    CSV records are dictionaries. JSON Lines records are the line text, which
+    decode_record turns into a dictionary, so that a bad line can be reported
+    like any other invalid record.
+    '''
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    elif fmt == "jsonl":
+        for line in stream:
+            line = line.strip()
+            if line != "":
+                yield line
+    else:
+        raise ValueError(f"Unknown format '{fmt}', choose from: {', '.join(FORMATS)}")
+
+def decode_record(record):
+    '''
+    Returns a record from read_records as a dictionary
+
+    Raises ValueError if a JSON Lines record is not valid JSON or not an object.
+    '''
+    if not isinstance(record, str):
+        return record
+    try:
+        record = json.loads(record)
+    except json.JSONDecodeError as error:
+        raise ValueError(f"Invalid JSON: {error}") from None
+    if not isinstance(record, dict):
+        raise ValueError("Record is not a JSON object")
+    return record
+
+def _parse_completed(value):
+    if isinstance(value, bool):
+        return value
+    value = str(value).strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError(f"Invalid completed value '{value}', use Yes or No")
+
+def record_to_task(record, users, today):
+    '''
+    Validates one imported record and returns it as a new, unnumbered Task
+
+    Raises ValueError describing the first problem found.
+    '''
+    for field in ("username", "title", "description", "due_date"):
+        if record.get(field) in (None, ""):
+            raise ValueError(f"Missing {field}")
+
+    username = str(record["username"])
+    if username not in users:
+        raise ValueError(f"User '{username}' does not exist")
+    title = str(record["title"])
+    description = str(record["description"])
+    check_storable(title, description)
+
+    due_date = parse_date(str(record["due_date"]))
+    assigned = record.get("assigned_date")
+    assigned_date = parse_date(str(assigned)) if assigned not in (None, "") else today
+    completed = _parse_completed(record.get("completed", False))
+
+    return Task(username, title, description, due_date, assigned_date, completed)
+
+def import_tasks(manager, stream, fmt):
+    '''
+    Imports tasks from a CSV or JSON Lines stream
+
+    Returns (imported, errors) where errors lists (record number, message)
+    for every invalid record. Nothing is stored unless every record is valid.
+    '''
+    users = manager.users
+    today = date.today()
+
+    new_tasks = []
+    errors = []
+    for record_number, record in enumerate(read_records(stream, fmt), start = 1):
+        try:
+            new_tasks.append(record_to_task(decode_record(record), users, today))
+        except ValueError as error:
+            errors.append((record_number, str(error)))
+
+    if errors:
+        return 0, errors
+
+    # Numbers the tasks and stores them in one write
+    manager.add_tasks(new_tasks)
+    return len(new_tasks), errors
+
+def task_to_record(task):
+    return {
+        "task_number": task.task_number,
+        "username": task.username,
+        "title": task.title,
+        "description": task.description,
+        "due_date": task.due_date_string(),
+        "assigned_date": task.assigned_date_string(),
+        "completed": task.completed,
+    }
+
+def export_tasks(tasks, stream, fmt):
+    '''
+    Writes tasks to a stream as CSV or JSON Lines, one task at a time
+
+    Returns the number of tasks written.
+    '''
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(stream)
+        writer.writerow(FIELDS)
+        for task in tasks:
+            writer.writerow([
+                task.task_number,
+                task.username,
+                task.title,
+                task.description,
+                task.due_date_string(),
+                task.assigned_date_string(),
+                "Yes" if task.completed else "No",
+            ])
+            count += 1
+    elif fmt == "jsonl":
+        for task in tasks:
+            stream.write(json.dumps(task_to_record(task)) + "\n")
+            count += 1
+    else:
+        raise ValueError(f"Unknown format '{fmt}', choose from: {', '.join(FORMATS)}")
+    return count
@@ -0,0 +1,214 @@
+'''
+Columnar report engine using NumPy
+
+For very large task files the report counts can be worked out without
+creating a Task object per line. tasks.txt is read as one block of bytes and
+the fields are located with vectorized searches for the ';' and newline
+separators, giving one array per column:
+
+    user_codes   integer code of each task's user, an index into usernames
+    due_dates    datetime64[D]
+    assigned     datetime64[D]
+    completed    bool
+    numbers      task numbers as integers
+
+Completed, pending and overdue tasks are then counted with bincount, and the
+counts are rendered by the functions in report.py so the overview files are
+identical to the ones the pure Python path writes.
+
+NumPy is optional: available() is False when it is not installed.
+'''
+from datetime import date
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from task import Task, parse_date
+
+
+def available():
+    return np is not None
+
+
+class TaskColumns:
+    def __init__(self, usernames, user_codes, due_dates, assigned, completed, numbers):
+        '''
+        Inputs:
+        usernames: list of the distinct usernames
+        user_codes, due_dates, assigned, completed, numbers: arrays with
+        one entry per task
+        '''
+        self.usernames = usernames
+        self.user_codes = user_codes
+        self.due_dates = due_dates
+        self.assigned = assigned
+        self.completed = completed
+        self.numbers = numbers
+
+    def __len__(self):
+        return len(self.user_codes)
+
+
+def _fixed_width(buf, starts, ends):
+    # The byte strings buf[start:end] as one fixed width bytes array
+    lengths = ends - starts
+    width = max(int(lengths.max()), 1) if len(lengths) else 1
+    offsets = np.arange(width)
+    index = np.minimum(starts[:, None] + offsets, len(buf) - 1)
+    chars = np.where(offsets < lengths[:, None], buf[index], 0).astype(np.uint8)
+    return chars.view(f"S{width}").ravel()
+
+def _parse_dates(buf, starts, ends):
+    # YYYY-MM-DD fields as datetime64[D], other formats go through parse_date
+    dates = np.empty(len(starts), dtype="datetime64[D]")
+    if len(starts) == 0:
+        return dates
+    last = len(buf) - 1
+    chars = [buf[np.minimum(starts + k, last)] for k in range(10)]
+    iso = (ends - starts == 10) & (chars[4] == ord("-")) & (chars[7] == ord("-"))
+    digits = {}
+    for k in (0, 1, 2, 3, 5, 6, 8, 9):
+        digits[k] = chars[k].astype(np.int32) - ord("0")
+        iso &= (chars[k] >= ord("0")) & (chars[k] <= ord("9"))
+    year = digits[0] * 1000 + digits[1] * 100 + digits[2] * 10 + digits[3]
+    month = digits[5] * 10 + digits[6]
+    day = digits[8] * 10 + digits[9]
+    months = ((year - 1970) * 12 + (month - 1)).astype("datetime64[M]")
+    dates[:] = months.astype("datetime64[D]") + (day - 1)
+
+    for i in np.flatnonzero(~iso):
+        text = bytes(buf[starts[i]:ends[i]]).decode("utf-8")
+        dates[i] = np.datetime64(parse_date(text), "D")
+    return dates
+
+def _parse_numbers(buf, starts, ends):
+    lengths = ends - starts
+    if len(lengths) == 0:
+        return np.empty(0, dtype=np.int64)
+    width = int(lengths.max())
+    offsets = np.arange(width)
+    index = np.minimum(starts[:, None] + offsets, len(buf) - 1)
+    valid = offsets < lengths[:, None]
+    digits = np.where(valid, buf[index].astype(np.int64) - ord("0"), 0)
+    powers = np.where(valid, 10 ** np.maximum(lengths[:, None] - 1 - offsets, 0), 0)
+    return (digits * powers).sum(axis=1)
+
+def parse_columns(data):
+    '''
+    Splits the bytes of a tasks file into TaskColumns
+
+    Raises ValueError if a line does not have the seven fields of a task.
+    '''
+    buf = np.frombuffer(data, dtype=np.uint8)
+    newlines = np.flatnonzero(buf == ord("\n"))
+    line_starts = np.concatenate(([0], newlines + 1))
+    line_ends = np.concatenate((newlines, [len(buf)]))
+    # Windows line endings
+    if len(buf):
+        carriage = (line_ends > line_starts) & (buf[np.maximum(line_ends - 1, 0)] == ord("\r"))
+        line_ends = line_ends - carriage
+    keep = line_ends > line_starts
+    line_starts = line_starts[keep]
+    line_ends = line_ends[keep]
+    if len(line_starts) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        no_dates = np.empty(0, dtype="datetime64[D]")
+        return TaskColumns([], empty, no_dates, no_dates, np.empty(0, dtype=bool), empty)
+
+    semicolons = np.flatnonzero(buf == ord(";"))
+    per_line = np.searchsorted(semicolons, line_ends) - np.searchsorted(semicolons, line_starts)
+    if len(semicolons) != 6 * len(line_starts) or np.any(per_line != 6):
+        raise ValueError("Every task must have 7 fields separated by ';'")
+    fields = semicolons.reshape(-1, 6)
+
+    names = _fixed_width(buf, line_starts, fields[:, 0])
+    if names.dtype.itemsize <= 8:
+        # Short names are compared as 8 byte integers, which is much faster
+        padded = np.zeros((len(names), 8), dtype=np.uint8)
+        padded[:, :names.dtype.itemsize] = names.view(np.uint8).reshape(len(names), -1)
+        unique_keys, user_codes = np.unique(padded.view(np.uint64).ravel(), return_inverse=True)
+        unique_names = unique_keys.view("S8")
+    else:
+        unique_names, user_codes = np.unique(names, return_inverse=True)
+    return TaskColumns(
+        [name.decode("utf-8") for name in unique_names],
+        user_codes.ravel(),
+        _parse_dates(buf, fields[:, 2] + 1, fields[:, 3]),
+        _parse_dates(buf, fields[:, 3] + 1, fields[:, 4]),
+        buf[fields[:, 4] + 1] == ord("Y"),
+        _parse_numbers(buf, fields[:, 5] + 1, line_ends),
+    )
+
+def _task_columns(tasks, usernames):
+    # Columns for a short list of Task objects, coded against usernames
+    codes = {name: i for i, name in enumerate(usernames)}
+    for task in tasks:
+        if task.username not in codes:
+            codes[task.username] = len(usernames)
+            usernames.append(task.username)
+    return TaskColumns(
+        usernames,
+        np.array([codes[t.username] for t in tasks], dtype=np.int64),
+        np.array([t.due_date for t in tasks], dtype="datetime64[D]"),
+        np.array([t.assigned_date for t in tasks], dtype="datetime64[D]"),
+        np.array([bool(t.completed) for t in tasks], dtype=bool),
+        np.array([int(t.task_number) for t in tasks], dtype=np.int64),
+    )
+
+def apply_changes(columns, tasks):
+    '''
+    Returns columns with the given tasks added, replacing rows with the same
+    task number, as when replaying the journal
+    '''
+    latest = {}
+    for task in tasks:
+        latest[task.task_number] = task
+    if not latest:
+        return columns
+
+    changed = _task_columns(list(latest.values()), list(columns.usernames))
+    keep = ~np.isin(columns.numbers, changed.numbers)
+    return TaskColumns(
+        changed.usernames,
+        np.concatenate((columns.user_codes[keep], changed.user_codes)),
+        np.concatenate((columns.due_dates[keep], changed.due_dates)),
+        np.concatenate((columns.assigned[keep], changed.assigned)),
+        np.concatenate((columns.completed[keep], changed.completed)),
+        np.concatenate((columns.numbers[keep], changed.numbers)),
+    )
+
+def load_columns(backend):
+    '''
+    Reads the tasks of a FlatFileBackend, including its journal, as TaskColumns
+    '''
+    with backend.lock.shared():
+        with open(backend.tasks_path, "rb") as task_file:
+            columns = parse_columns(task_file.read())
+        journaled = [Task.from_string(t_str) for _, t_str in backend.journal.replay(0)]
+    return apply_changes(columns, journaled)
+
+def aggregate_columns(columns, today = None):
+    '''
+    Counts completed, pending and overdue tasks with vectorized operations
+
+    Output: (totals, per_user) in the same form as report.aggregate()
+    '''
+    if today is None:
+        today = date.today()
+    # 0 completed, 1 pending, 2 overdue, as in report.STATUS_INDEX
+    status = np.where(columns.completed, 0, np.where(columns.due_dates < np.datetime64(today, "D"), 2, 1))
+    totals = np.bincount(status, minlength=3)
+    counts = np.bincount(columns.user_codes * 3 + status, minlength=3 * len(columns.usernames)).reshape(-1, 3)
+
+    assigned = np.flatnonzero(counts.sum(axis=1))
+    per_user = {columns.usernames[i]: [int(n) for n in counts[i]] for i in assigned}
+    return [int(n) for n in totals], per_user
+
+def report_counts(backend, today = None):
+    '''
+    Report counts for the tasks of a FlatFileBackend without loading them as
+    Task objects
+    '''
+    return aggregate_columns(load_columns(backend), today)
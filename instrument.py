@@ -0,0 +1,255 @@
+'''
+Opt-in timing and I/O counters for the task manager
+
+When enabled, the functions listed in TARGETS are replaced with wrappers that
+count calls, add up wall time and, for the file helpers, the bytes read or
+written. Nothing is wrapped unless enable() is called, so there is no cost
+when instrumentation is off.
+
+Times include the time spent in other instrumented functions called from
+inside, so "menu.view_mine" includes the "Task.display" calls it makes.
+Generator functions such as read_tasks are timed while they produce items,
+not while the caller works on them.
+
+Enable it with the --metrics or --metrics-file options of task_manager.py, or
+by setting TASK_MANAGER_METRICS to a file name ("-" prints the summary on exit
+instead).
+'''
+import atexit
+import cProfile
+import functools
+import inspect
+import json
+import os
+import pstats
+import sys
+import time
+
+METRICS_VARIABLE = "TASK_MANAGER_METRICS"
+
+# Modules searched for references to the wrapped functions
+MODULES = ["task", "report", "store", "journal", "storage", "manager", "bulk", "snapshot"]
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def _journal_written(args, kwargs, result):
+    _, op, task_strs = args
+    return 0, sum(len(f"{op};{s}\n".encode("utf-8")) for s in task_strs)
+
+def _journal_read(args, kwargs, result):
+    journal = args[0]
+    offset = args[1] if len(args) > 1 else kwargs.get("offset", 0)
+    return journal.end_offset - offset, 0
+
+def _snapshot_size(args):
+    return _file_size(_modules["snapshot"].snapshot_path(args[0]))
+
+def _overview_written(args, kwargs, result):
+    return 0, len(args[0].encode("utf-8")) + len(args[1].encode("utf-8"))
+
+# (label, module, attribute, bytes function) where the bytes function is called
+# with (args, kwargs, result) after each call and returns (read, written)
+TARGETS = [
+    ("menu.reg_user", "task_manager", "reg_user", None),
+    ("menu.add_task", "task_manager", "add_task", None),
+    ("menu.view_all", "task_manager", "view_all", None),
+    ("menu.view_mine", "task_manager", "view_mine", None),
+    ("menu.display_statistics", "task_manager", "display_statistics", None),
+    ("TaskManager.generate_report", "manager", "TaskManager.generate_report", None),
+    ("TaskManager.add_tasks", "manager", "TaskManager.add_tasks", None),
+    ("TaskManager.complete_task", "manager", "TaskManager.complete_task", None),
+    ("TaskManager.edit_task", "manager", "TaskManager.edit_task", None),
+    ("Task.from_string", "task", "Task.from_string", None),
+    ("Task.to_string", "task", "Task.to_string", None),
+    ("Task.display", "task", "Task.display", None),
+    ("parse_date", "task", "parse_date", None),
+    ("read_tasks", "task", "read_tasks", lambda args, kwargs, result: (_file_size(args[0]), 0)),
+    ("report.aggregate", "report", "aggregate", None),
+    ("report.render_task_overview", "report", "render_task_overview", None),
+    ("report.render_user_overview", "report", "render_user_overview", None),
+    ("report.write_overview_files", "report", "write_overview_files", _overview_written),
+    ("TaskStore.stats", "store", "TaskStore.stats", None),
+    ("TaskJournal.append_many", "journal", "TaskJournal.append_many", _journal_written),
+    ("TaskJournal.replay", "journal", "TaskJournal.replay", _journal_read),
+    ("FlatFileBackend.load_store", "storage", "FlatFileBackend.load_store", None),
+    ("FlatFileBackend.refresh", "storage", "FlatFileBackend.refresh", None),
+    ("FlatFileBackend._load_users", "storage", "FlatFileBackend._load_users",
+     lambda args, kwargs, result: (_file_size(args[0].users_path), 0)),
+    ("FlatFileBackend.write_users_to_file", "storage", "FlatFileBackend.write_users_to_file",
+     lambda args, kwargs, result: (0, _file_size(args[0].users_path))),
+    ("FlatFileBackend.write_tasks_to_file", "storage", "FlatFileBackend.write_tasks_to_file",
+     lambda args, kwargs, result: (0, _file_size(args[0].tasks_path))),
+    ("snapshot.load", "snapshot", "load", lambda args, kwargs, result: (_snapshot_size(args), 0)),
+    ("snapshot.save", "snapshot", "save", lambda args, kwargs, result: (0, _snapshot_size(args))),
+    ("snapshot.content_hash", "snapshot", "content_hash", lambda args, kwargs, result: (_file_size(args[0]), 0)),
+    ("SQLiteBackend.load_store", "storage", "SQLiteBackend.load_store", None),
+    ("SQLiteBackend.refresh", "storage", "SQLiteBackend.refresh", None),
+]
+
+
+class Metrics:
+    def __init__(self):
+        # label -> [calls, seconds, bytes read, bytes written]
+        self.counters = {}
+
+    def record(self, label, seconds, read = 0, written = 0):
+        counter = self.counters.get(label)
+        if counter is None:
+            counter = self.counters[label] = [0, 0.0, 0, 0]
+        counter[0] += 1
+        counter[1] += seconds
+        counter[2] += read
+        counter[3] += written
+
+    def as_dict(self):
+        return {
+            label: {"calls": calls, "seconds": seconds, "bytes_read": read, "bytes_written": written}
+            for label, (calls, seconds, read, written) in self.counters.items()
+        }
+
+    def summary(self):
+        '''
+        Returns the counters as a table, slowest first
+        '''
+        lines = [f"{'operation':<36}{'calls':>9}{'total ms':>12}{'mean ms':>10}{'read':>12}{'written':>12}"]
+        for label, (calls, seconds, read, written) in sorted(self.counters.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{label:<36}{calls:>9}{seconds * 1000:>12.2f}{seconds * 1000 / calls:>10.3f}"
+                         f"{read:>12}{written:>12}")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        '''
+        Writes the counters as JSON, or prints the summary if path is "-"
+        '''
+        if path == "-":
+            print(self.summary(), file=sys.stderr)
+            return
+        with open(path, "w") as metrics_file:
+            json.dump(self.as_dict(), metrics_file, indent=2)
+
+
+metrics = Metrics()
+# (owner, attribute, original) for every replaced attribute
+_patched = []
+# Module name -> module, for the modules being instrumented
+_modules = {}
+
+
+def _wrap(label, function, count_bytes):
+    if inspect.isgeneratorfunction(function):
+        @functools.wraps(function)
+        def generator_wrapper(*args, **kwargs):
+            items = function(*args, **kwargs)
+            elapsed = 0.0
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(items)
+                except StopIteration:
+                    elapsed += time.perf_counter() - start
+                    break
+                elapsed += time.perf_counter() - start
+                yield item
+            read, written = count_bytes(args, kwargs, None) if count_bytes else (0, 0)
+            metrics.record(label, elapsed, read, written)
+        return generator_wrapper
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+        read, written = count_bytes(args, kwargs, result) if count_bytes else (0, 0)
+        metrics.record(label, elapsed, read, written)
+        return result
+    return wrapper
+
+def _replace(owner, attribute, value):
+    _patched.append((owner, attribute, owner.__dict__[attribute] if isinstance(owner, type) else getattr(owner, attribute)))
+    setattr(owner, attribute, value)
+
+def _patch(label, module_name, attribute, count_bytes):
+    module = _modules.get(module_name)
+    if module is None:
+        return
+
+    class_name, _, name = attribute.rpartition(".")
+    if class_name:
+        owner = getattr(module, class_name)
+        raw = owner.__dict__[name]
+        if isinstance(raw, (classmethod, staticmethod)):
+            _replace(owner, name, type(raw)(_wrap(label, raw.__func__, count_bytes)))
+        else:
+            _replace(owner, name, _wrap(label, raw, count_bytes))
+        return
+
+    # Functions imported by name elsewhere are replaced there as well
+    original = getattr(module, name)
+    wrapped = _wrap(label, original, count_bytes)
+    for other in _modules.values():
+        for other_attribute, value in list(vars(other).items()):
+            if value is original:
+                _replace(other, other_attribute, wrapped)
+
+def enable(dump_to = None, menu_module = None):
+    '''
+    Wraps every target in TARGETS
+
+    Inputs:
+    dump_to: optional metrics file written on exit, "-" prints the summary
+    menu_module: the running task_manager module, for the menu targets,
+    which is __main__ when task_manager.py is run as a program
+    '''
+    if _patched:
+        return
+    for module_name in MODULES:
+        if module_name not in sys.modules:
+            __import__(module_name)
+        _modules[module_name] = sys.modules[module_name]
+    if "server" in sys.modules:
+        _modules["server"] = sys.modules["server"]
+    if menu_module is not None:
+        _modules["task_manager"] = menu_module
+    for label, module_name, attribute, count_bytes in TARGETS:
+        _patch(label, module_name, attribute, count_bytes)
+    if dump_to is not None:
+        atexit.register(metrics.dump, dump_to)
+
+def disable():
+    '''
+    Puts back the original functions
+    '''
+    while _patched:
+        owner, attribute, original = _patched.pop()
+        setattr(owner, attribute, original)
+    _modules.clear()
+
+def enable_from_environment(menu_module = None):
+    '''
+    Enables instrumentation if TASK_MANAGER_METRICS is set
+    '''
+    path = os.environ.get(METRICS_VARIABLE)
+    if path:
+        enable(path, menu_module)
+
+def profile(function, path, *args, **kwargs):
+    '''
+    Runs function under cProfile and saves the statistics to path
+
+    The 20 entries with the highest cumulative time are printed as well.
+    Returns the function's result.
+    '''
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function, *args, **kwargs)
+    finally:
+        profiler.dump_stats(path)
+        stats = pstats.Stats(profiler, stream=sys.stderr)
+        stats.sort_stats("cumulative").print_stats(20)
@@ -0,0 +1,119 @@
+'''
+Append-only journal of task mutations for task_manager.py
+
+Instead of rewriting tasks.txt for every change, each added or edited task is
+appended to the journal as one line and synced to disk. On startup the journal
+is replayed over the last snapshot in tasks.txt, and compaction folds it back
+into tasks.txt once it grows past COMPACT_SIZE or when asked to with
+"python storage.py compact".
+
+Journal lines have the form "<op>;<task string>" where the task string is the
+same as a line in tasks.txt.
+'''
+import os
+
+JOURNAL_FILE = "tasks.journal"
+
+# Size in bytes after which the journal is folded back into tasks.txt
+COMPACT_SIZE = 1024 * 1024
+
+# Journal operations
+ADD = "add"
+UPDATE = "update"
+
+
+class TaskJournal:
+    def __init__(self, path = JOURNAL_FILE):
+        '''
+        Inputs:
+        path: String
+        '''
+        self.path = path
+        self.end_offset = 0
+
+    def _trim_torn_tail(self):
+        # A record without its trailing newline was cut off by a crash while
+        # it was being written. It is dropped before anything is appended.
+        try:
+            journal_file = open(self.path, "r+b")
+        except FileNotFoundError:
+            return
+        with journal_file:
+            end = journal_file.seek(0, os.SEEK_END)
+            if end == 0:
+                return
+            journal_file.seek(end - 1)
+            if journal_file.read(1) == b"\n":
+                return
+            # Look back for the end of the last complete record
+            pos = end
+            while pos > 0:
+                step = min(4096, pos)
+                pos -= step
+                journal_file.seek(pos)
+                last_newline = journal_file.read(step).rfind(b"\n")
+                if last_newline != -1:
+                    pos += last_newline + 1
+                    break
+            journal_file.truncate(pos)
+
+    def append(self, op, task_str):
+        '''
+        Appends one record and waits until it is on disk
+        '''
+        self.append_many(op, [task_str])
+
+    def append_many(self, op, task_strs):
+        '''
+        Appends a batch of records with one write and one sync
+
+        Returns the size of the journal afterwards.
+        '''
+        self._trim_torn_tail()
+        with open(self.path, "ab") as journal_file:
+            journal_file.write("".join([f"{op};{task_str}\n" for task_str in task_strs]).encode())
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+            return journal_file.tell()
+
+    def replay(self, offset = 0):
+        '''
+        Yields the (op, task string) records in the order they were written,
+        starting at the given byte offset
+
+        The journal is read line by line. Once the records are exhausted,
+        end_offset holds the offset just after the last complete record, which
+        is where the next replay should start. A torn final record is skipped.
+        '''
+        self.end_offset = offset
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "rb") as journal_file:
+            journal_file.seek(offset)
+            for line in journal_file:
+                if not line.endswith(b"\n"):
+                    break
+                self.end_offset += len(line)
+                line = line.decode().rstrip("\n")
+                if line != "":
+                    op, task_str = line.split(";", 1)
+                    yield op, task_str
+
+    def size(self):
+        '''
+        Current size of the journal in bytes
+        '''
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def clear(self):
+        '''
+        Empties the journal once its records are part of the snapshot
+        '''
+        if os.path.exists(self.path):
+            with open(self.path, "w") as journal_file:
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
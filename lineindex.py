@@ -0,0 +1,99 @@
+'''
+Byte offsets of the lines of tasks.txt, for patching tasks in place
+
+When changes are not journaled, every change used to rewrite the whole of
+tasks.txt. With a LineIndex a changed task whose line keeps the same length
+in bytes, for example a new due date, is written over its old line with one
+small write instead. Changes that alter the length of the line, such as
+completing a task ("No" becomes "Yes"), still need a full rewrite.
+
+The index is built by scanning the file once and belongs to one version of
+it: identity records file_identity() of the file it describes, and an index
+whose identity no longer matches must be rebuilt.
+
+A patch keeps the inode and size of the file, so other processes could only
+tell it apart by its modification time, which may not change on file systems
+with coarse timestamps. Every patch therefore also raises a count kept in
+tasks.patches, which other processes compare along with the identity.
+'''
+import os
+
+from locking import file_identity
+
+PATCH_COUNT_FILE = "tasks.patches"
+
+
+def read_patch_count(path):
+    '''
+    Number of patches recorded in a patch count file, 0 if there is none
+    '''
+    try:
+        with open(path, "rb") as count_file:
+            return int(count_file.read() or 0)
+    except FileNotFoundError:
+        return 0
+
+def write_patch_count(path, count):
+    '''
+    Records a new patch count, called with the exclusive lock held
+    '''
+    with open(path, "wb") as count_file:
+        count_file.write(b"%d" % count)
+
+
+class LineIndex:
+    def __init__(self, path):
+        '''
+        Inputs:
+        path: String, the tasks file
+        '''
+        self.path = path
+        # task number -> (offset of the line, length of the line in bytes
+        # without its line ending)
+        self.lines = {}
+        self.identity = None
+
+    @classmethod
+    def scan(cls, path):
+        '''
+        Builds the index of a tasks file
+        '''
+        index = cls(path)
+        index.identity = file_identity(path)
+        offset = 0
+        with open(path, "rb") as task_file:
+            for raw_line in task_file:
+                line = raw_line.rstrip(b"\r\n")
+                if line.strip():
+                    task_number = line[line.rfind(b";") + 1:].decode("utf-8")
+                    index.lines[task_number] = (offset, len(line))
+                offset += len(raw_line)
+        return index
+
+    def is_current(self):
+        return self.identity is not None and self.identity == file_identity(self.path)
+
+    def fits(self, task_number, line):
+        '''
+        True if the encoded line can be written over the task's current line
+        '''
+        entry = self.lines.get(task_number)
+        return entry is not None and entry[1] == len(line)
+
+    def patch(self, changes):
+        '''
+        Writes encoded lines over the lines of the same tasks and syncs the file
+
+        Input: list of (task number, encoded line) pairs that all fit()
+        '''
+        with open(self.path, "r+b") as task_file:
+            for task_number, line in changes:
+                offset, _ = self.lines[task_number]
+                if hasattr(os, "pwrite"):
+                    os.pwrite(task_file.fileno(), line, offset)
+                else:
+                    task_file.seek(offset)
+                    task_file.write(line)
+                    task_file.flush()
+            os.fsync(task_file.fileno())
+        self.identity = file_identity(self.path)
@@ -0,0 +1,92 @@
+'''
+Inter-process file locks for the task files
+
+Several copies of the task manager can work on the same tasks.txt and
+user.txt. Readers hold a shared lock while they catch up with changes on disk
+and writers hold an exclusive lock while they change the files, so reads run
+in parallel and writes are serialized.
+
+Locks are taken on a separate lock file with fcntl.flock. Where fcntl is not
+available (Windows) msvcrt is used instead, which only has exclusive locks,
+so readers are serialized there as well.
+'''
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+LOCK_FILE = "tasks.lock"
+
+
+class FileLock:
+    def __init__(self, path = LOCK_FILE):
+        '''
+        Inputs:
+        path: String, the lock file, created if missing
+        '''
+        self.path = path
+        self._file = None
+        # Locks are re-entrant within a process: (mode, depth)
+        self._mode = None
+        self._depth = 0
+
+    def _acquire(self, exclusive):
+        self._file = open(self.path, "a+b")
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _release(self):
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+    @contextmanager
+    def _hold(self, exclusive):
+        if self._depth == 0:
+            self._acquire(exclusive)
+            self._mode = exclusive
+        elif exclusive and not self._mode:
+            raise RuntimeError("Cannot upgrade a shared lock to an exclusive lock")
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                self._release()
+                self._mode = None
+
+    def shared(self):
+        '''
+        Context manager holding the lock for reading
+        '''
+        return self._hold(False)
+
+    def exclusive(self):
+        '''
+        Context manager holding the lock for writing
+        '''
+        return self._hold(True)
+
+
+def file_identity(path):
+    '''
+    Returns a value that changes whenever the file is replaced or modified,
+    or None if the file does not exist
+    '''
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
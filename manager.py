@@ -0,0 +1,456 @@
+'''
+Importable core of the task manager
+
+TaskManager ties the storage backend, the task store, user management and
+the reports together without any prompts or printing, so it can be used by
+the command line in task_manager.py as well as by scripts and benchmarks.
+Nothing is read from disk until it is first needed: looking up users only
+reads the users, and tasks are loaded on first access. With the SQLite
+backend, looking tasks up, listing, changing and counting them are queries
+that do not load the tasks at all.
+
+Other processes may be changing the same data, so every access first picks up
+their changes, and every change is made inside backend.locked().
+
+Old completed tasks can be moved to the archive (see archive.py). Reports
+still count them, and their task numbers are not given out again.
+'''
+import heapq
+import os
+from datetime import date, timedelta
+
+import report
+import storage
+from archive import TaskArchive
+from rollup import RollupLog
+from task import Task, parse_date
+
+# Storage backend to use, "flat" (tasks.txt and user.txt) or "sqlite"
+STORAGE_BACKEND = os.environ.get("TASK_MANAGER_STORAGE", "flat")
+
+# Report engine, "python" or "numpy" (see columnar.py)
+REPORT_ENGINE = os.environ.get("TASK_MANAGER_REPORT_ENGINE", "python")
+REPORT_ENGINES = ("python", "numpy")
+
+# Processes that count the tasks for a report (see sharded.py)
+REPORT_WORKERS = int(os.environ.get("TASK_MANAGER_REPORT_WORKERS", "1"))
+
+# Whether generate_report() records the day's counts in rollups.txt (see
+# rollup.py). Set TASK_MANAGER_ROLLUPS=0 to turn this off.
+RECORD_ROLLUPS = os.environ.get("TASK_MANAGER_ROLLUPS", "1") != "0"
+
+# Completed tasks due more than this many days ago are archived when the
+# task manager closes. Unset (the default) to only archive on request.
+AUTO_ARCHIVE_DAYS = os.environ.get("TASK_MANAGER_ARCHIVE_DAYS")
+AUTO_ARCHIVE_DAYS = None if AUTO_ARCHIVE_DAYS in (None, "") else int(AUTO_ARCHIVE_DAYS)
+
+# Values accepted by the status filter of list_tasks()
+STATUSES = ("completed", "incomplete", "overdue")
+
+
+def _columnar():
+    # columnar.py imports NumPy, which would slow down every start
+    import columnar
+    return columnar
+
+def check_storable(*values):
+    '''
+    Ensures that strings are safe to store
+
+    Raises ValueError if any value contains the ';' field separator or a
+    line break, which separates the records.
+    '''
+    for value in values:
+        if ";" in value:
+            raise ValueError("Your input cannot contain a ';' character")
+        if "\n" in value or "\r" in value:
+            raise ValueError("Your input must be on one line")
+
+
+class TaskManager:
+    def __init__(self, backend = None, report_engine = None, archive = None, auto_archive_days = None, report_workers = None):
+        '''
+        Inputs:
+        backend: StorageBackend, defaults to the one named by STORAGE_BACKEND
+        report_engine: String, defaults to REPORT_ENGINE
+        report_workers: Integer, defaults to REPORT_WORKERS
+        archive: TaskArchive, defaults to the archive/ directory
+        auto_archive_days: Integer, defaults to AUTO_ARCHIVE_DAYS
+        '''
+        if report_engine is None:
+            report_engine = REPORT_ENGINE
+        if report_engine not in REPORT_ENGINES:
+            raise ValueError(f"Unknown report engine '{report_engine}', choose from: {', '.join(REPORT_ENGINES)}")
+        if report_engine == "numpy" and not _columnar().available():
+            raise ValueError("The numpy report engine needs NumPy to be installed")
+        if report_workers is None:
+            report_workers = REPORT_WORKERS
+        if report_workers < 1:
+            raise ValueError("The number of report workers must be at least 1")
+        self._backend = backend
+        self.report_engine = report_engine
+        self.report_workers = report_workers
+        self.archive = TaskArchive() if archive is None else archive
+        self.auto_archive_days = AUTO_ARCHIVE_DAYS if auto_archive_days is None else auto_archive_days
+        self.rollups = RollupLog()
+        # report_key() of the data the overview files were last written from
+        self.last_report_key = None
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = storage.open_backend(STORAGE_BACKEND)
+        return self._backend
+
+    @property
+    def store(self):
+        '''
+        TaskStore with every task, loaded on first use
+        '''
+        if self.backend.store is None:
+            self.backend.load_store()
+        else:
+            self.backend.refresh()
+        return self.backend.store
+
+    @property
+    def users(self):
+        '''
+        Dictionary of username-password key-value pairs, loaded on first use
+        '''
+        if self.backend.users is None:
+            self.backend.load_users()
+        else:
+            self.backend.refresh()
+        return self.backend.users
+
+    def authenticate(self, username, password):
+        '''
+        Returns None if the login is valid, otherwise the reason it is not
+        '''
+        if username not in self.users:
+            return "User does not exist"
+        if self.users[username] != password:
+            return "Wrong password"
+        return None
+
+    def register_user(self, username, password):
+        '''
+        Adds a new user
+
+        Raises ValueError if the username is taken or either value cannot be stored.
+        '''
+        if ";" in username or ";" in password:
+            raise ValueError("Username or password cannot contain ';'.")
+        check_storable(username, password)
+        with self.backend.locked():
+            if username in self.users:
+                raise ValueError("Username already exists.")
+            self.backend.add_user(username, password)
+
+    def add_task(self, username, title, description, due_date, assigned_date = None):
+        '''
+        Creates, stores and returns a new task
+
+        Input: due_date and assigned_date as dates or YYYY-MM-DD strings,
+        assigned_date defaults to today
+        '''
+        new_task = self.new_task(username, title, description, due_date, assigned_date)
+        self.add_tasks([new_task])
+        return new_task
+
+    def new_task(self, username, title, description, due_date, assigned_date = None):
+        '''
+        Validates and returns a new, unnumbered task without storing it
+
+        Takes the same inputs as add_task(). Raises ValueError if they are invalid.
+        '''
+        if username not in self.users:
+            raise ValueError("User does not exist. Please enter a valid username")
+        check_storable(title, description)
+        if isinstance(due_date, str):
+            due_date = parse_date(due_date)
+        if assigned_date is None:
+            assigned_date = date.today()
+        elif isinstance(assigned_date, str):
+            assigned_date = parse_date(assigned_date)
+
+        return Task(username, title, description, due_date, assigned_date, False)
+
+    def add_tasks(self, tasks):
+        '''
+        Numbers and stores a batch of new, already validated tasks with one write
+
+        Task numbers are assigned while the backend is locked, so tasks added
+        at the same time by other processes never share a number, and follow
+        the archived tasks' numbers.
+        '''
+        with self.backend.locked():
+            next_number = max(self.backend.next_task_number(), self.archive.next_task_number())
+            # The SQLite backend works without loading the tasks, and then
+            # only the database changes
+            store = self.backend.store
+            for i, task in enumerate(tasks):
+                task.task_number = str(next_number + i)
+                if store is not None:
+                    store.add(task)
+            self.backend.add_tasks(tasks)
+
+    def get_task(self, task_number):
+        return self.backend.get_task(task_number)
+
+    def complete_task(self, task_number):
+        '''
+        Marks a task as complete, stores and returns it
+        '''
+        with self.backend.locked():
+            task = self.backend.get_task(task_number)
+            if task is None:
+                raise ValueError("Task does not exist.")
+            if self.backend.store is not None:
+                task = self.backend.store.complete(task_number)
+            else:
+                task.completed = True
+            self.backend.update_task(task)
+        return task
+
+    def edit_task(self, task_number, username = None, due_date = None):
+        '''
+        Reassigns a task and/or changes its due date, stores and returns it
+
+        Completed tasks cannot be edited. Raises ValueError, before anything
+        is changed, if a value has the wrong type.
+        '''
+        if username is not None and not isinstance(username, str):
+            raise ValueError("The username must be a string")
+        if due_date is not None and not isinstance(due_date, (str, date)):
+            raise ValueError("The due date must be a date or a YYYY-MM-DD string")
+        if isinstance(due_date, str):
+            due_date = parse_date(due_date)
+
+        with self.backend.locked():
+            task = self.backend.get_task(task_number)
+            if task is None:
+                raise ValueError("Task does not exist.")
+            if task.completed:
+                raise ValueError("Task has been completed. You cannot edit a completed task.")
+            if username is not None and username not in self.users:
+                raise ValueError("User does not exist. Please enter a valid username")
+
+            store = self.backend.store
+            if username is not None:
+                if store is not None:
+                    store.reassign(task_number, username)
+                else:
+                    task.username = username
+            if due_date is not None:
+                if store is not None:
+                    store.set_due_date(task_number, due_date)
+                else:
+                    task.due_date = due_date
+            self.backend.update_task(task)
+        return task
+
+    def all_tasks(self):
+        return self.store
+
+    def tasks_for_user(self, username):
+        return self.backend.tasks_for_user(username)
+
+    def list_tasks(self, username = None, status = None, due_from = None, due_to = None, sort_by_due = False, offset = 0, limit = None, today = None):
+        '''
+        Returns one page of the tasks matching the filters and the number
+        of matching tasks
+
+        Inputs:
+        username: String, only this user's tasks
+        status: one of STATUSES, overdue tasks are incomplete and due before today
+        due_from, due_to: dates or YYYY-MM-DD strings, only tasks due on or between these days
+        sort_by_due: Boolean, order by due date instead of by task number
+        offset, limit: Integers, the page to return, limit None for every task after offset
+
+        Raises ValueError if offset is negative or limit is below 1.
+        '''
+        if offset < 0:
+            raise ValueError("The offset cannot be negative")
+        if limit is not None and limit < 1:
+            raise ValueError("The limit must be at least 1")
+        if isinstance(due_from, str):
+            due_from = parse_date(due_from)
+        if isinstance(due_to, str):
+            due_to = parse_date(due_to)
+
+        completed = None
+        if status is not None:
+            if status not in STATUSES:
+                raise ValueError(f"Unknown status '{status}', choose from: {', '.join(STATUSES)}")
+            completed = status == "completed"
+            if status == "overdue":
+                if today is None:
+                    today = date.today()
+                yesterday = today - timedelta(days=1)
+                due_to = yesterday if due_to is None else min(due_to, yesterday)
+
+        # The SQLite backend filters with a query instead of loading every task
+        matching = self.backend.query_tasks(username, completed, due_from, due_to)
+        if sort_by_due:
+            key = lambda task: (task.due_date, int(task.task_number))
+            if limit is None:
+                matching.sort(key=key)
+            else:
+                # Only the tasks up to the end of the page need ordering
+                return heapq.nsmallest(offset + limit, matching, key=key)[offset:], len(matching)
+        end = None if limit is None else offset + limit
+        return matching[offset:end], len(matching)
+
+    def overdue_tasks(self, username = None, today = None):
+        '''
+        Returns the incomplete tasks due before today, earliest first
+        '''
+        return self.store.overdue(today, username)
+
+    def tasks_due_within(self, days, username = None, today = None):
+        '''
+        Returns the incomplete tasks due from today to days ahead, earliest first
+        '''
+        if days < 0:
+            raise ValueError("The number of days cannot be negative")
+        return self.store.due_within(days, today, username)
+
+    def next_due_by_user(self, today = None):
+        '''
+        Returns a dictionary of each user's next incomplete task due today or later
+        '''
+        return self.store.next_due(today)
+
+    def report_counts(self, today = None):
+        '''
+        Returns (totals, per_user) counts in the same form as report.aggregate()
+
+        With the numpy engine or several report workers, flat files whose
+        tasks are not loaded yet are counted without loading them, column by
+        column and/or in parallel shards. Once the tasks are loaded the
+        store's running totals are used either way. Archived tasks are added
+        to the completed counts from the segment summaries.
+        '''
+        unloaded_flat_files = self.backend.store is None and isinstance(self.backend, storage.FlatFileBackend)
+        if unloaded_flat_files and self.report_workers > 1:
+            # Imported here as they pull in NumPy and multiprocessing
+            import sharded
+            totals, per_user = sharded.report_counts(self.backend, today, self.report_workers, self.report_engine)
+        elif unloaded_flat_files and self.report_engine == "numpy":
+            totals, per_user = _columnar().report_counts(self.backend, today)
+        else:
+            totals, per_user = self.backend.report_counts(today)
+
+        archived, archived_per_user = self.archive.completed_counts()
+        if archived == 0:
+            return totals, per_user
+        # The store's running totals are copied rather than added to
+        totals = list(totals)
+        totals[0] += archived
+        per_user = {username: list(counts) for username, counts in per_user.items()}
+        for username, count in archived_per_user.items():
+            per_user.setdefault(username, [0, 0, 0])[0] += count
+        return totals, per_user
+
+    def archive_completed(self, days, today = None):
+        '''
+        Moves completed tasks due more than days ago into a new archive segment
+
+        Returns the archived tasks, oldest due date first. Nothing is written
+        when there are none.
+        '''
+        if days < 0:
+            raise ValueError("The number of days cannot be negative")
+        if today is None:
+            today = date.today()
+        cutoff = today - timedelta(days=days)
+
+        with self.backend.locked():
+            tasks = [task for task in self.store.with_status(True) if task.due_date < cutoff]
+            if not tasks:
+                return []
+            tasks.sort(key=lambda task: (task.due_date, int(task.task_number)))
+            # The segment is complete before the tasks leave the live data,
+            # so an interrupted run can never lose them
+            self.archive.write_segment(tasks)
+            self.backend.remove_tasks([task.task_number for task in tasks])
+        return tasks
+
+    def report_key(self):
+        '''
+        Identifies the data the overview files were generated from
+        '''
+        return (self.backend.data_version(), date.today(), len(self.users), len(self.archive.summaries()))
+
+    def render_reports(self, counts = None):
+        '''
+        Returns the texts of task_overview.txt and user_overview.txt
+
+        Input: counts, output of report_counts() if already worked out
+        '''
+        users = list(self.users)
+        totals, per_user = self.report_counts() if counts is None else counts
+        task_overview = report.render_task_overview(totals)
+        user_overview = report.render_user_overview(users, totals, per_user)
+        return task_overview, user_overview
+
+    def generate_report(self):
+        '''
+        Writes task_overview.txt and user_overview.txt
+
+        Returns the rendered texts of both files. The counts are also
+        recorded in the daily rollups unless RECORD_ROLLUPS is off.
+        '''
+        today = date.today()
+        # Taken before counting, so that changes made meanwhile by other
+        # processes make the files count as out of date
+        key = self.report_key()
+        counts = self.report_counts(today)
+        task_overview, user_overview = self.render_reports(counts)
+        report.write_overview_files(task_overview, user_overview)
+        if RECORD_ROLLUPS:
+            self.rollups.record(today, *counts)
+        self.last_report_key = key
+        return task_overview, user_overview
+
+    def record_rollup(self, today = None):
+        '''
+        Records the day's counts in the daily rollups without writing the
+        overview files, for running once a day from a scheduler
+        '''
+        if today is None:
+            today = date.today()
+        return self.rollups.record(today, *self.report_counts(today))
+
+    def trend(self, days, username = None, today = None):
+        '''
+        Returns (date, [completed, pending, overdue]) for each day recorded
+        in the last days days up to today, for all tasks or for one user
+
+        Only the rollups are read, not the tasks.
+        '''
+        if days < 1:
+            raise ValueError("The number of days must be at least 1")
+        if today is None:
+            today = date.today()
+        return self.rollups.trend(today - timedelta(days=days - 1), today, username)
+
+    def statistics(self):
+        '''
+        Returns the report texts, rewriting the overview files only when
+        they are out of date
+        '''
+        if (self.last_report_key != self.report_key()
+                or not os.path.exists(report.TASK_OVERVIEW_FILE)
+                or not os.path.exists(report.USER_OVERVIEW_FILE)):
+            return self.generate_report()
+        return self.render_reports()
+
+    def close(self):
+        # The archive policy only runs when the tasks were loaded anyway
+        if self._backend is not None and self._backend.store is not None and self.auto_archive_days is not None:
+            self.archive_completed(self.auto_archive_days)
+        if self._backend is not None:
+            self._backend.close()
@@ -0,0 +1,121 @@
+'''
+Report engine for task_manager.py
+
+Classifies every task as completed, pending or overdue and aggregates the
+totals and the per-user counts in one pass over the tasks, then writes each
+overview file with a single write.
+'''
+from datetime import date
+
+TASK_OVERVIEW_FILE = "task_overview.txt"
+USER_OVERVIEW_FILE = "user_overview.txt"
+
+# Completion status codes: "c"=completed, "i"=incomplete, "o"=overdue and incomplete
+COMPLETED = "c"
+PENDING = "i"
+OVERDUE = "o"
+
+# Position of each status in a [completed, pending, overdue] counter list
+STATUS_INDEX = {COMPLETED: 0, PENDING: 1, OVERDUE: 2}
+
+
+def percentage(x, total):
+    '''
+    Percentage of x in total, 0 when there is nothing to divide by
+    '''
+    if total == 0:
+        return 0.0
+    percent = (x/total) * 100
+    return percent
+
+def classify(task, today):
+    '''
+    Returns the completion status code of a task on the given date
+    '''
+    if task.completed:
+        return COMPLETED
+    # Tasks due today are not overdue yet
+    if task.due_date < today:
+        return OVERDUE
+    return PENDING
+
+def aggregate(tasks, today=None):
+    '''
+    Counts completed, pending and overdue tasks in one pass
+
+    Input: iterable of Task objects and the reference date (defaults to today)
+    Output: (totals, per_user) where totals is a [completed, pending, overdue]
+    list and per_user maps each assigned username to the same kind of list
+    '''
+    if today is None:
+        today = date.today()
+
+    totals = [0, 0, 0]
+    per_user = {}
+    for task in tasks:
+        status = STATUS_INDEX[classify(task, today)]
+        totals[status] += 1
+
+        user_counts = per_user.get(task.username)
+        if user_counts is None:
+            user_counts = per_user[task.username] = [0, 0, 0]
+        user_counts[status] += 1
+
+    return totals, per_user
+
+def render_task_overview(totals):
+    '''
+    Text of task_overview.txt for the given [completed, pending, overdue] totals
+    '''
+    completed, pending, overdue = totals
+    uncompleted = pending + overdue
+    total_num_tasks = completed + uncompleted
+
+    return f"""The following information generated and tracked by task_manager.py.\n
+Total number of tasks: \t\t\t\t {total_num_tasks}
+Total number of completed tasks: \t\t {completed}
+Total number of uncompleted tasks: \t\t {uncompleted}
+Number of incomplete and overdue tasks: \t {overdue}
+Percentage of incomplete tasks: \t\t {percentage(uncompleted, total_num_tasks)}%
+Percentage of overdue tasks: \t\t\t {percentage(overdue, total_num_tasks)}%"""
+
+def render_user_overview(users, totals, per_user):
+    '''
+    Text of user_overview.txt
+
+    Input: list of registered usernames and the output of aggregate()
+    '''
+    total_num_tasks = sum(totals)
+    no_tasks = [0, 0, 0]
+
+    lines = [f"""The following information has been generated and tracked by task_manager.py.
+Total number of registered users: {len(users)}
+Total number of registered tasks: {total_num_tasks}\n"""]
+
+    # Share of all tasks assigned to each user
+    for u in users:
+        num_tasks_assigned = sum(per_user.get(u, no_tasks))
+        lines.append(f"""
+{u} assigned to {percentage(num_tasks_assigned, total_num_tasks)}% of tasks that have been assigned in total.""")
+
+    # Completion breakdown for each user
+    for u in users:
+        complete, incomplete, overdue = per_user.get(u, no_tasks)
+        uncomplete = incomplete + overdue
+        total_to_user = complete + uncomplete
+        lines.append(f"""\n\n{u} assigned to {total_to_user} tasks
+{u} completed {percentage(complete, total_to_user)}% of their tasks
+{u} has yet to complete {percentage(uncomplete, total_to_user)}% of their tasks
+Percentage of tasks assigned to {u} overdue: {percentage(overdue, total_to_user)}%""")
+
+    return "".join(lines)
+
+def write_overview_files(task_overview, user_overview, task_overview_path=TASK_OVERVIEW_FILE, user_overview_path=USER_OVERVIEW_FILE):
+    '''
+    Writes already rendered overview texts, one write per file
+    '''
+    with open(task_overview_path, "w") as t_o_file:
+        t_o_file.write(task_overview)
+
+    with open(user_overview_path, "w") as u_o_file:
+        u_o_file.write(user_overview)
@@ -0,0 +1,119 @@
+'''
+Daily rollups of the report counts, for trends over time
+
+The overview files only show the current counts. Every report run also
+records the day's counts in rollups.txt, one row per user plus a row for
+all tasks, whose username field is empty:
+
+    2026-10-18;;120;40;12
+    2026-10-18;admin;30;10;2
+    2026-10-18;bob;90;30;10
+
+with the completed, pending and overdue counts as in report.aggregate().
+A later run on the same day replaces that day's rows, so each day keeps the
+counts of its last report. Rows are kept in date order, so a trend over
+the last few days finds its first row with a binary search over the file
+and reads only the rows of those days, never the tasks.
+'''
+import os
+
+from locking import FileLock
+from task import format_date, parse_date
+
+ROLLUP_FILE = "rollups.txt"
+
+# Once the binary search has narrowed the first row down to this many
+# bytes, the rows are read in order
+SCAN_BYTES = 64 * 1024
+
+
+class RollupLog:
+    def __init__(self, path = ROLLUP_FILE):
+        '''
+        Inputs:
+        path: String, created on the first record()
+        '''
+        self.path = path
+        self.lock = FileLock(path + ".lock")
+
+    @staticmethod
+    def _find(rollup_file, size, day_str):
+        # Offset of the first row dated day_str or later, or of the end
+        # of the file. Every row before lo is dated before day_str.
+        lo, hi = 0, size
+        while hi - lo > SCAN_BYTES:
+            mid = (lo + hi) // 2
+            rollup_file.seek(mid)
+            rollup_file.readline()
+            start = rollup_file.tell()
+            line = rollup_file.readline()
+            if line and line[:10].decode("utf-8") < day_str:
+                lo = start + len(line)
+            else:
+                hi = mid
+        rollup_file.seek(lo)
+        for line in rollup_file:
+            if lo >= size or line[:10].decode("utf-8") >= day_str:
+                break
+            lo += len(line)
+        return min(lo, size)
+
+    def record(self, day, totals, per_user):
+        '''
+        Stores the day's counts in place of any recorded earlier that day
+
+        Input: the date and the output of report.aggregate(). Returns False,
+        without recording, if later days have been recorded already.
+        '''
+        day_str = format_date(day)
+        rows = [f"{day_str};;{totals[0]};{totals[1]};{totals[2]}\n"]
+        for username in sorted(per_user):
+            completed, pending, overdue = per_user[username]
+            if completed or pending or overdue:
+                rows.append(f"{day_str};{username};{completed};{pending};{overdue}\n")
+
+        with self.lock.exclusive(), open(self.path, "a+b") as rollup_file:
+            size = rollup_file.seek(0, os.SEEK_END)
+            rollup_file.seek(max(size - SCAN_BYTES, 0))
+            tail = rollup_file.read()
+            # Rows end with a newline, anything after the last one was cut
+            # off by a crash and is dropped
+            complete = tail[:tail.rfind(b"\n") + 1]
+            size -= len(tail) - len(complete)
+            last_row = complete[complete.rfind(b"\n", 0, len(complete) - 1) + 1:]
+            if last_row[:10].decode("utf-8") > day_str:
+                return False
+            start = self._find(rollup_file, size, day_str)
+            rollup_file.truncate(start)
+            rollup_file.write("".join(rows).encode("utf-8"))
+            rollup_file.flush()
+            os.fsync(rollup_file.fileno())
+        return True
+
+    def trend(self, first_day, last_day, username = None):
+        '''
+        Returns (date, [completed, pending, overdue]) for each recorded day
+        from first_day to last_day, for all tasks or for one user
+
+        Days the user had no tasks on are left out, as are days without a
+        report run.
+        '''
+        if not os.path.exists(self.path):
+            return []
+        first_str = format_date(first_day)
+        last_str = format_date(last_day).encode("utf-8")
+        # Rows of other users are skipped without decoding them
+        key = b";" + ("" if username is None else username).encode("utf-8") + b";"
+
+        days = []
+        with self.lock.shared(), open(self.path, "rb") as rollup_file:
+            size = rollup_file.seek(0, os.SEEK_END)
+            rollup_file.seek(self._find(rollup_file, size, first_str))
+            for line in rollup_file:
+                # A row cut off by a crash ends the rows
+                if line[:10] > last_str or not line.endswith(b"\n"):
+                    break
+                if line.startswith(key, 10):
+                    fields = line.decode("utf-8").rstrip("\n").split(";")
+                    days.append((parse_date(fields[0]), [int(n) for n in fields[-3:]]))
+        return days
@@ -0,0 +1,421 @@
+'''
+JSON API over HTTP for the task manager
+
+A small HTTP/1.1 server built on asyncio streams from the standard library.
+It offers the same operations as the interactive menu:
+
+    GET   /tasks                   view all tasks
+    GET   /users/{name}/tasks      view a user's tasks
+    POST  /tasks                   add a task
+    POST  /tasks/{n}/complete      mark a task as complete
+    PATCH /tasks/{n}               reassign a task or change its due date
+    POST  /users                   register a user (admin only)
+    GET   /report                  report counts as JSON (admin only)
+    POST  /report                  generate the overview files (admin only)
+
+Every request logs in with HTTP Basic authentication against the users, and
+as in the menu only the admin may work on other users' tasks.
+
+All requests share one TaskManager and so one in-memory store. Reads are
+answered straight from the store, and encoded responses are reused until the
+store changes. Writes are put on a queue that a single writer task works
+through in order, handing each batch to a writer thread so that reads are
+still answered while it waits for the disk. New tasks waiting on the queue
+together are stored with one write.
+
+Start it with:
+    python task_manager.py serve [--host 127.0.0.1] [--port 8000]
+'''
+import asyncio
+import base64
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import unquote, urlsplit
+
+from bulk import task_to_record
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+
+# Largest request body accepted, in bytes
+MAX_BODY = 1024 * 1024
+
+# Seconds between checks for changes made by other processes. Changes made
+# through the server itself are seen at once.
+REFRESH_INTERVAL = 0.05
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _task_json(task):
+    record = task_to_record(task)
+    record["completed"] = bool(task.completed)
+    return record
+
+def encode_json(value):
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+class TaskServer:
+    def __init__(self, manager):
+        '''
+        Inputs:
+        manager: TaskManager shared by every request
+        '''
+        self.manager = manager
+        self.queue = asyncio.Queue()
+        self._writer_task = None
+        self._executor = None
+        # Cleared while the writer thread is working through a batch
+        self._idle = asyncio.Event()
+        self._idle.set()
+        # Encoded read responses, emptied whenever the store changes
+        self._cache = {}
+        self._cache_key = None
+        self._last_refresh = 0.0
+
+    # Writes
+
+    async def _run_writes(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            jobs = [await self.queue.get()]
+            while not self.queue.empty():
+                jobs.append(self.queue.get_nowait())
+
+            self._idle.clear()
+            try:
+                outcomes = await loop.run_in_executor(self._executor, self._apply_writes, jobs)
+            finally:
+                self._idle.set()
+            # Futures belong to the event loop, so they are only set here
+            self._check_cache()
+            for future, error, result in outcomes:
+                if future.cancelled():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+    def _apply_writes(self, jobs):
+        # Runs on the writer thread. Returns (future, error, result) for
+        # every job.
+        outcomes = []
+        # Runs of waiting new tasks are numbered and stored together
+        start = 0
+        while start < len(jobs):
+            end = start
+            while end < len(jobs) and jobs[end][0] == "add":
+                end += 1
+            if end > start:
+                outcomes += self._store_new_tasks(jobs[start:end])
+                start = end
+            else:
+                _, work, future = jobs[start]
+                try:
+                    outcomes.append((future, None, work()))
+                except Exception as error:
+                    outcomes.append((future, error, None))
+                start += 1
+        return outcomes
+
+    def _store_new_tasks(self, jobs):
+        tasks = [task for _, task, _ in jobs]
+        try:
+            self.manager.add_tasks(tasks)
+        except Exception as error:
+            return [(future, error, None) for _, _, future in jobs]
+        return [(future, None, task) for _, task, future in jobs]
+
+    def write(self, work):
+        '''
+        Queues a function that changes the data and returns a future of its result
+        '''
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait(("call", work, future))
+        return future
+
+    def write_task(self, task):
+        '''
+        Queues a new task to be numbered and stored, returns a future of the task
+        '''
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait(("add", task, future))
+        return future
+
+    # Reads
+
+    def refresh(self):
+        '''
+        Picks up changes made by other processes, at most once per REFRESH_INTERVAL
+
+        Nothing is done while a write batch is running, as the writer thread
+        catches up itself before writing.
+        '''
+        now = time.monotonic()
+        if self._idle.is_set() and now - self._last_refresh >= REFRESH_INTERVAL:
+            self.manager.backend.refresh()
+            self._last_refresh = now
+
+    @property
+    def store(self):
+        return self.manager.backend.store
+
+    @property
+    def users(self):
+        return self.manager.backend.users
+
+    async def wait_idle(self):
+        '''
+        Waits until no write batch is running
+        '''
+        while not self._idle.is_set():
+            await self._idle.wait()
+
+    def _check_cache(self):
+        current = (self.store.version, len(self.users))
+        if current != self._cache_key:
+            self._cache = {}
+            self._cache_key = current
+
+    async def cached(self, key, build):
+        '''
+        Returns the encoded response for key, building it if the store changed
+
+        While a write batch is running the response from before it is
+        returned, since none of its writes has been answered yet. A response
+        that has to be built waits for the batch to finish, so that the store
+        does not change under it.
+        '''
+        if not self._idle.is_set():
+            body = self._cache.get(key)
+            if body is not None:
+                return body
+        await self.wait_idle()
+        self._check_cache()
+        body = self._cache.get(key)
+        if body is None:
+            body = self._cache[key] = encode_json(build())
+        return body
+
+    # Requests
+
+    def authenticate(self, headers):
+        '''
+        Returns the username logged in with HTTP Basic authentication
+        '''
+        credentials = headers.get("authorization", "")
+        scheme, _, encoded = credentials.partition(" ")
+        if scheme.lower() != "basic":
+            raise HTTPError(HTTPStatus.UNAUTHORIZED, "Login required")
+        try:
+            username, _, password = base64.b64decode(encoded).decode("utf-8").partition(":")
+        except ValueError:
+            raise HTTPError(HTTPStatus.UNAUTHORIZED, "Invalid credentials")
+        if username not in self.users:
+            raise HTTPError(HTTPStatus.UNAUTHORIZED, "User does not exist")
+        if self.users[username] != password:
+            raise HTTPError(HTTPStatus.UNAUTHORIZED, "Wrong password")
+        return username
+
+    @staticmethod
+    def require_admin(user):
+        if user != "admin":
+            raise HTTPError(HTTPStatus.FORBIDDEN, "This requires admin privileges")
+
+    def own_task(self, user, task_number):
+        task = self.store.get(task_number)
+        if task is None or (task.username != user and user != "admin"):
+            raise HTTPError(HTTPStatus.NOT_FOUND, "You do not have a task with that number.")
+        return task
+
+    async def dispatch(self, method, path, headers, body):
+        '''
+        Handles one request and returns (status, encoded JSON body)
+        '''
+        self.refresh()
+        user = self.authenticate(headers)
+        parts = [unquote(part) for part in urlsplit(path).path.strip("/").split("/")]
+        data = json.loads(body) if body else {}
+        if not isinstance(data, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Request body must be a JSON object")
+
+        if parts == ["tasks"]:
+            if method == "GET":
+                return HTTPStatus.OK, await self.cached("tasks", lambda: [
+                    _task_json(t) for t in self.store
+                ])
+            if method == "POST":
+                # Checking the user catches up with other processes, which
+                # only one thread may do at a time
+                await self.wait_idle()
+                task = self.manager.new_task(
+                    str(data.get("username", user)),
+                    str(data.get("title", "")),
+                    str(data.get("description", "")),
+                    str(data.get("due_date", "")),
+                )
+                task = await self.write_task(task)
+                return HTTPStatus.CREATED, encode_json(_task_json(task))
+
+        elif len(parts) == 3 and parts[0] == "users" and parts[2] == "tasks" and method == "GET":
+            username = parts[1]
+            if username != user:
+                self.require_admin(user)
+            return HTTPStatus.OK, await self.cached(("user", username), lambda: [
+                _task_json(t) for t in self.store.for_user(username)
+            ])
+
+        elif len(parts) == 3 and parts[0] == "tasks" and parts[2] == "complete" and method == "POST":
+            self.own_task(user, parts[1])
+            task = await self.write(lambda: self.manager.complete_task(parts[1]))
+            return HTTPStatus.OK, encode_json(_task_json(task))
+
+        elif len(parts) == 2 and parts[0] == "tasks" and method == "PATCH":
+            self.own_task(user, parts[1])
+            task = await self.write(lambda: self.manager.edit_task(
+                parts[1], data.get("username"), data.get("due_date"),
+            ))
+            return HTTPStatus.OK, encode_json(_task_json(task))
+
+        elif parts == ["users"] and method == "POST":
+            self.require_admin(user)
+            username = str(data.get("username", ""))
+            password = str(data.get("password", ""))
+            if username == "" or password == "":
+                raise ValueError("Username and password are required")
+            await self.write(lambda: self.manager.register_user(username, password))
+            return HTTPStatus.CREATED, encode_json({"username": username})
+
+        elif parts == ["report"]:
+            self.require_admin(user)
+            if method == "GET":
+                return HTTPStatus.OK, await self.cached("report", self.report_json)
+            if method == "POST":
+                task_overview, user_overview = await self.write(self.manager.generate_report)
+                return HTTPStatus.OK, encode_json({
+                    "task_overview": task_overview,
+                    "user_overview": user_overview,
+                })
+
+        else:
+            raise HTTPError(HTTPStatus.NOT_FOUND, "Not found")
+        raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "Method not allowed")
+
+    def report_json(self):
+        # Counts archived tasks as well, like the report files
+        totals, per_user = self.manager.report_counts()
+        names = ("completed", "pending", "overdue")
+        return {
+            "total": dict(zip(names, totals)),
+            "users": {
+                user: dict(zip(names, per_user.get(user, (0, 0, 0))))
+                for user in self.users
+            },
+        }
+
+    # Connections
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, version = request_line.decode("latin-1").split()
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    status, body = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, encode_json({"error": "Request body too large"})
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, body = await self.respond(method, path, headers, body)
+                    connection = headers.get("connection", "").lower()
+                    keep_alive = connection != "close" and (version != "HTTP/1.0" or connection == "keep-alive")
+
+                head = (
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                )
+                if status == HTTPStatus.UNAUTHORIZED:
+                    head += 'WWW-Authenticate: Basic realm="tasks"\r\n'
+                if not keep_alive:
+                    head += "Connection: close\r\n"
+                writer.write(head.encode("latin-1") + b"\r\n" + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, method, path, headers, body):
+        try:
+            return await self.dispatch(method, path, headers, body)
+        except HTTPError as error:
+            return error.status, encode_json({"error": error.message})
+        except json.JSONDecodeError:
+            return HTTPStatus.BAD_REQUEST, encode_json({"error": "Request body is not valid JSON"})
+        except ValueError as error:
+            return HTTPStatus.BAD_REQUEST, encode_json({"error": str(error)})
+        except Exception:
+            # A bug in one request must not take the connection handler down
+            return HTTPStatus.INTERNAL_SERVER_ERROR, encode_json({"error": "Internal server error"})
+
+    async def serve(self, host = DEFAULT_HOST, port = DEFAULT_PORT, ready = None):
+        '''
+        Serves requests until cancelled
+
+        Inputs:
+        ready: optional function called with the listening server
+        '''
+        # Loads the data before the first request
+        self.manager.users
+        self.manager.store
+        self._executor = ThreadPoolExecutor(max_workers = 1)
+        self._writer_task = asyncio.create_task(self._run_writes())
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        if ready is not None:
+            ready(server)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self._writer_task.cancel()
+            # Lets a batch already on the writer thread finish
+            self._executor.shutdown()
+
+
+def run(manager, host = DEFAULT_HOST, port = DEFAULT_PORT):
+    '''
+    Runs the server until interrupted
+    '''
+    server = TaskServer(manager)
+
+    def ready(listening):
+        address = listening.sockets[0].getsockname()
+        print(f"Serving on http://{address[0]}:{address[1]}")
+
+    try:
+        asyncio.run(server.serve(host, port, ready))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,169 @@
+'''
+Parallel report counts over shards of tasks.txt
+
+tasks.txt is split into byte ranges that start and end on line boundaries,
+one per worker process. Each worker reads its range in blocks of whole lines
+and counts completed, pending and overdue tasks per user, either line by
+line ("python" engine) or with columnar.py ("numpy" engine), and the partial
+counts are added together at the end.
+
+Journaled changes are counted in the main process. Their task numbers are
+sent to the workers, which skip the older versions of those tasks found in
+tasks.txt.
+'''
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import report
+from task import Task, format_date, parse_date
+
+# Bytes read at a time by each worker
+BLOCK_SIZE = 8 * 1024 * 1024
+
+
+def shard_ranges(path, shards):
+    '''
+    Splits a file into up to shards (start, end) byte ranges of about the
+    same size, each made of whole lines
+    '''
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as task_file:
+        for i in range(1, shards):
+            position = max(size * i // shards, bounds[-1])
+            if position >= size:
+                break
+            # Move on to the start of the next line
+            task_file.seek(position)
+            task_file.readline()
+            if task_file.tell() > bounds[-1]:
+                bounds.append(task_file.tell())
+    if bounds[-1] < size:
+        bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+def read_blocks(path, start, end):
+    '''
+    Yields the bytes from start to end in blocks of whole lines
+    '''
+    with open(path, "rb") as task_file:
+        task_file.seek(start)
+        remaining = end - start
+        tail = b""
+        while remaining > 0:
+            block = task_file.read(min(BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            block = tail + block
+            cut = block.rfind(b"\n") + 1 if remaining > 0 else len(block)
+            tail = block[cut:]
+            if cut:
+                yield block[:cut]
+
+def count_lines(data, today, skip = frozenset()):
+    '''
+    Counts the tasks in bytes of tasks.txt lines, leaving out the task
+    numbers in skip
+
+    Output: (totals, per_user) in the same form as report.aggregate()
+    '''
+    today_str = format_date(today)
+    totals = [0, 0, 0]
+    per_user = {}
+    for line in data.decode("utf-8").split("\n"):
+        line = line.rstrip("\r")
+        if line == "":
+            continue
+        fields = line.split(";")
+        if len(fields) != 7:
+            raise ValueError("Every task must have 7 fields separated by ';'")
+        if fields[6] in skip:
+            continue
+        if fields[5] == "Yes":
+            status = 0
+        else:
+            due = fields[3]
+            # Zero-padded dates compare correctly as text
+            overdue = due < today_str if len(due) == 10 else parse_date(due) < today
+            status = 2 if overdue else 1
+        totals[status] += 1
+        user_counts = per_user.get(fields[0])
+        if user_counts is None:
+            user_counts = per_user[fields[0]] = [0, 0, 0]
+        user_counts[status] += 1
+    return totals, per_user
+
+def count_columns(data, today, skip = frozenset()):
+    '''
+    Same as count_lines(), with the vectorized parser in columnar.py
+    '''
+    import columnar
+    columns = columnar.parse_columns(data)
+    if skip:
+        keep = ~columnar.np.isin(columns.numbers, [int(n) for n in skip])
+        columns = columnar.TaskColumns(
+            columns.usernames, columns.user_codes[keep], columns.due_dates[keep],
+            columns.assigned[keep], columns.completed[keep], columns.numbers[keep],
+        )
+    return columnar.aggregate_columns(columns, today)
+
+def merge_counts(results):
+    '''
+    Adds up (totals, per_user) counts
+    '''
+    totals = [0, 0, 0]
+    per_user = {}
+    for part_totals, part_per_user in results:
+        for status in range(3):
+            totals[status] += part_totals[status]
+        for username, counts in part_per_user.items():
+            user_counts = per_user.get(username)
+            if user_counts is None:
+                per_user[username] = list(counts)
+            else:
+                for status in range(3):
+                    user_counts[status] += counts[status]
+    return totals, per_user
+
+def count_shard(path, start, end, today, skip, engine):
+    '''
+    Counts the tasks in one byte range of a tasks file, run in a worker
+    '''
+    count = count_columns if engine == "numpy" else count_lines
+    return merge_counts(count(block, today, skip) for block in read_blocks(path, start, end))
+
+def report_counts(backend, today = None, workers = None, engine = "python"):
+    '''
+    Report counts for the tasks of a FlatFileBackend, counted by workers
+    processes without loading the tasks
+
+    Inputs:
+    workers: Integer, defaults to the number of CPUs
+    engine: String, "python" or "numpy"
+    '''
+    if today is None:
+        today = date.today()
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    # tasks.txt cannot be replaced or patched while the shared lock is held
+    with backend.lock.shared():
+        journaled = {}
+        for _, t_str in backend.journal.replay(0):
+            task = Task.from_string(t_str)
+            journaled[task.task_number] = task
+        skip = frozenset(journaled)
+        shards = shard_ranges(backend.tasks_path, workers)
+
+        if workers == 1 or len(shards) <= 1:
+            results = [count_shard(backend.tasks_path, start, end, today, skip, engine) for start, end in shards]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(count_shard, backend.tasks_path, start, end, today, skip, engine)
+                           for start, end in shards]
+                results = [future.result() for future in futures]
+
+    results.append(report.aggregate(journaled.values(), today))
+    return merge_counts(results)
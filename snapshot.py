@@ -0,0 +1,138 @@
+'''
+Binary snapshots of parsed text files, for fast startup
+
+Parsing tasks.txt splits every line and builds a Task object and the store's
+indexes for it. A snapshot keeps the result in a marshal file next to the text
+file (tasks.txt.snapshot, user.txt.snapshot) which is loaded with a single
+read and no parsing. Each snapshot is keyed on the size, modification time
+and a hash of the file it was made from, and is only used while they match.
+
+The size and modification time are checked first. If they match but the
+file was last modified shortly before the snapshot was written, a later
+change within the resolution of the file system's clock could have kept the
+same time, so the contents are hashed as well before the snapshot is trusted.
+
+Marshal data is specific to the Python version, which is part of the key
+too. A snapshot that does not match is ignored, and the caller parses the
+text file and writes a new one. Set TASK_MANAGER_SNAPSHOT=0 to never read or
+write snapshots.
+'''
+import gc
+import hashlib
+import marshal
+import os
+import struct
+import sys
+import time
+
+# Whether snapshots are used
+SNAPSHOT_MODE = os.environ.get("TASK_MANAGER_SNAPSHOT", "1") != "0"
+
+SNAPSHOT_SUFFIX = ".snapshot"
+
+# Changed whenever the layout of the snapshotted values changes
+FORMAT_VERSION = 1
+
+# Files modified less than this long before their snapshot was written are
+# hashed before the snapshot is used
+RACY_NS = 2 * 10**9
+
+# Length of the header that precedes the snapshotted value
+HEADER_LENGTH = struct.Struct("<I")
+
+
+def snapshot_path(path):
+    return path + SNAPSHOT_SUFFIX
+
+def content_hash(path):
+    '''
+    Hash of a file's contents
+    '''
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as source_file:
+        while True:
+            block = source_file.read(1024 * 1024)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+def _version():
+    return (FORMAT_VERSION,) + tuple(sys.version_info[:2])
+
+def _read_key(snapshot_file):
+    # Reads the header and returns the key the snapshot was made with
+    (header_length,) = HEADER_LENGTH.unpack(snapshot_file.read(HEADER_LENGTH.size))
+    return marshal.loads(snapshot_file.read(header_length))
+
+def _matches(path, key):
+    version, size, mtime_ns, written_ns, source_hash = key
+    stat = os.stat(path)
+    if version != _version() or size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+        return False
+    return written_ns - mtime_ns >= RACY_NS or content_hash(path) == source_hash
+
+def is_current(path):
+    '''
+    True if there is a snapshot of the current contents of the file at path
+    '''
+    try:
+        with open(snapshot_path(path), "rb") as snapshot_file:
+            return _matches(path, _read_key(snapshot_file))
+    except (OSError, struct.error, EOFError, ValueError, TypeError):
+        return False
+
+def load(path, restore = None):
+    '''
+    Returns the value snapshotted from the file at path, or None if there
+    is no snapshot of its current contents
+
+    Input: restore, optional function that turns the loaded value into the
+    one returned, for example into Task objects
+    '''
+    try:
+        with open(snapshot_path(path), "rb") as snapshot_file:
+            # The whole snapshot in one read, the header is decoded from memory
+            data = snapshot_file.read()
+        (header_length,) = HEADER_LENGTH.unpack_from(data)
+        start = HEADER_LENGTH.size + header_length
+        if not _matches(path, marshal.loads(data[HEADER_LENGTH.size:start])):
+            return None
+    except (OSError, struct.error, EOFError, ValueError, TypeError):
+        return None
+
+    # Collections triggered by the many new objects would only slow the
+    # load down, as none of them are garbage
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        try:
+            value = marshal.loads(memoryview(data)[start:])
+        except (EOFError, ValueError, TypeError):
+            return None
+        return value if restore is None else restore(value)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+def save(path, value):
+    '''
+    Writes a snapshot of value, parsed from the file at path
+
+    The file must not change while it is read and snapshotted, so callers
+    hold the backend's lock. A snapshot is only a cache, so one that cannot
+    be written is skipped.
+    '''
+    # Several readers may save at once, each through its own temporary file
+    tmp_path = f"{snapshot_path(path)}.{os.getpid()}.tmp"
+    try:
+        stat = os.stat(path)
+        header = marshal.dumps((_version(), stat.st_size, stat.st_mtime_ns, time.time_ns(), content_hash(path)))
+        with open(tmp_path, "wb") as snapshot_file:
+            snapshot_file.write(HEADER_LENGTH.pack(len(header)))
+            snapshot_file.write(header)
+            snapshot_file.write(marshal.dumps(value))
+        os.replace(tmp_path, snapshot_path(path))
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
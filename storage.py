@@ -0,0 +1,758 @@
+'''
+Storage backends for task_manager.py
+
+A backend loads the tasks and users at startup and persists every change the
+task manager makes. Two backends are available:
+
+flat   - tasks.txt and user.txt with ';' separated fields, with changes
+         journaled to tasks.journal (see journal.py)
+sqlite - a tasks.db SQLite database with indexes on the assigned user,
+         completion status and due date
+
+Several processes can share the same data. Changes are made inside
+locked(), which keeps other writers out and first catches up with whatever
+other processes have stored, and refresh() catches up before reads. Only the
+changed data is reloaded: the flat backend replays the journal from where it
+last stopped and the SQLite backend selects rows with a newer generation.
+
+Data can be moved between backends, and the flat backend's journal folded
+into tasks.txt, with:
+    python storage.py migrate <from> <to>
+    python storage.py compact
+'''
+import argparse
+import os
+import sqlite3
+from contextlib import contextmanager, nullcontext
+from datetime import date
+
+from journal import TaskJournal, JOURNAL_FILE, COMPACT_SIZE, ADD, UPDATE
+import snapshot
+from lineindex import LineIndex, PATCH_COUNT_FILE, read_patch_count, write_patch_count
+from locking import FileLock, LOCK_FILE, file_identity
+from store import TaskStore
+from task import Task, read_tasks, format_date
+
+TASKS_FILE = "tasks.txt"
+USERS_FILE = "user.txt"
+DATABASE_FILE = "tasks.db"
+
+# Whether the flat backend journals changes (see journal.py). Set
+# TASK_MANAGER_JOURNAL=0 to write changes into tasks.txt instead.
+JOURNAL_MODE = os.environ.get("TASK_MANAGER_JOURNAL", "1") != "0"
+
+# Account created when there are no users yet
+DEFAULT_USERS = {"admin": "password"}
+
+
+class StorageBackend:
+    '''
+    Interface shared by the storage backends
+
+    load_store() and load_users() are called once, when the tasks or users
+    are first needed. The backend keeps the returned store and dictionary and
+    persists each change made through add_task(), update_task() and add_user().
+    '''
+    store = None
+    users = None
+
+    def load_store(self):
+        '''
+        Returns a TaskStore holding every task
+        '''
+        raise NotImplementedError
+
+    def load_users(self):
+        '''
+        Returns a dictionary of username-password key-value pairs
+        '''
+        raise NotImplementedError
+
+    def refresh(self):
+        '''
+        Brings the loaded store and users up to date with changes stored by
+        other processes
+        '''
+
+    def data_version(self):
+        '''
+        Returns a value that changes whenever the stored tasks change, in
+        this process or any other, without loading the tasks
+        '''
+        raise NotImplementedError
+
+    def locked(self):
+        '''
+        Context manager for making changes
+
+        Holds off writers in other processes and refreshes first, so that
+        task numbers and edits are based on the latest data.
+        '''
+        return nullcontext()
+
+    def add_task(self, task):
+        raise NotImplementedError
+
+    def update_task(self, task):
+        raise NotImplementedError
+
+    def add_tasks(self, tasks):
+        '''
+        Persists a batch of new tasks
+        '''
+        for task in tasks:
+            self.add_task(task)
+
+    def remove_tasks(self, task_numbers):
+        '''
+        Removes tasks from the store and from storage, used when archiving
+        '''
+        raise NotImplementedError
+
+    def add_user(self, username, password):
+        raise NotImplementedError
+
+    def replace_all(self, tasks, users):
+        '''
+        Replaces all stored tasks and users, used when migrating
+        '''
+        raise NotImplementedError
+
+    def _current_store(self):
+        # The store, loaded or brought up to date
+        if self.store is None:
+            self.load_store()
+        else:
+            self.refresh()
+        return self.store
+
+    def report_counts(self, today = None):
+        '''
+        Returns (totals, per_user) counts in the same form as report.aggregate()
+        '''
+        return self._current_store().stats(today)
+
+    def tasks_for_user(self, username):
+        '''
+        Returns the tasks assigned to a user
+        '''
+        return self._current_store().for_user(username)
+
+    def get_task(self, task_number):
+        '''
+        Returns the task with the given number, or None
+        '''
+        return self._current_store().get(task_number)
+
+    def next_task_number(self):
+        '''
+        Task number to give the next new task, never one given out before
+        '''
+        return int(self._current_store().next_task_number())
+
+    def query_tasks(self, username = None, completed = None, due_from = None, due_to = None):
+        '''
+        Returns the tasks matching every filter given, in the order they were added
+
+        Takes the same filters as TaskStore.query().
+        '''
+        return list(self._current_store().query(username, completed, due_from, due_to))
+
+    def close(self):
+        pass
+
+
+class FlatFileBackend(StorageBackend):
+    def __init__(self, tasks_path = TASKS_FILE, users_path = USERS_FILE, journal_path = JOURNAL_FILE, journal_mode = None, lock_path = LOCK_FILE, snapshot_mode = None, patch_count_path = PATCH_COUNT_FILE):
+        '''
+        Inputs:
+        tasks_path: String
+        users_path: String
+        journal_path: String
+        journal_mode: Boolean, journal changes instead of writing them into
+        tasks.txt, defaults to JOURNAL_MODE
+        lock_path: String, lock file shared by every process using these files
+        snapshot_mode: Boolean, start from snapshots of the parsed files (see
+        snapshot.py), defaults to snapshot.SNAPSHOT_MODE
+        patch_count_path: String, counts the lines patched into tasks.txt
+        (see lineindex.py)
+        '''
+        self.tasks_path = tasks_path
+        self.users_path = users_path
+        self.journal = TaskJournal(journal_path)
+        self.journal_mode = JOURNAL_MODE if journal_mode is None else journal_mode
+        self.snapshot_mode = snapshot.SNAPSHOT_MODE if snapshot_mode is None else snapshot_mode
+        self.lock = FileLock(lock_path)
+
+        # What has been loaded: the identity of the tasks.txt snapshot, how
+        # far into the journal has been replayed and the identity of user.txt
+        self._tasks_identity = None
+        self._journal_offset = 0
+        self._users_identity = None
+        # Line offsets of tasks.txt for in-place updates when not journaling,
+        # built on the first update
+        self.line_index = None
+        self.patch_count_path = patch_count_path
+        self._patch_count = 0
+
+    def load_store(self):
+        with self.lock.shared():
+            self._load_store(self.snapshot_mode)
+        return self.store
+
+    def _load_store(self, use_snapshot = False):
+        # Read and parse tasks.txt, or its snapshot when starting up
+        if not os.path.exists(self.tasks_path):
+            with open(self.tasks_path, "a") as default_file:
+                pass
+
+        self._tasks_identity = file_identity(self.tasks_path)
+        self._patch_count = read_patch_count(self.patch_count_path)
+        store = snapshot.load(self.tasks_path, TaskStore.from_snapshot_state) if use_snapshot else None
+        if store is None:
+            store = TaskStore(read_tasks(self.tasks_path))
+            if use_snapshot:
+                snapshot.save(self.tasks_path, store.snapshot_state())
+        # A reloaded store carries on from the old store's version, so
+        # callers comparing versions always see the change
+        if self.store is not None:
+            store.version += self.store.version + 1
+        self.store = store
+
+        # Replay changes journaled since tasks.txt was last written.
+        # The store replaces tasks with the same number, so replaying twice is harmless.
+        self._replay_journal(0)
+
+    def _replay_journal(self, offset):
+        for op, t_str in self.journal.replay(offset):
+            self.store.add(Task.from_string(t_str))
+        self._journal_offset = self.journal.end_offset
+
+    def load_users(self):
+        # If no user.txt file, write one with a default account
+        if not os.path.exists(self.users_path):
+            with self.lock.exclusive():
+                if not os.path.exists(self.users_path):
+                    self.write_users_to_file(DEFAULT_USERS)
+
+        with self.lock.shared():
+            self._load_users(self.snapshot_mode)
+        return self.users
+
+    def _load_users(self, use_snapshot = False):
+        # Read in user_data and convert to a dictionary. Reloads build a new
+        # dictionary and then replace self.users, so a thread looking users
+        # up meanwhile never sees it half filled. Callers read self.users on
+        # every access rather than keeping the dictionary.
+        self._users_identity = file_identity(self.users_path)
+        if use_snapshot and self.users is None:
+            self.users = snapshot.load(self.users_path)
+            if self.users is not None:
+                return
+        users = {}
+        with open(self.users_path, 'r') as user_file:
+            for user in user_file:
+                user = user.rstrip("\n")
+                if user != "":
+                    username, password = user.split(';')
+                    users[username] = password
+        self.users = users
+        if use_snapshot:
+            snapshot.save(self.users_path, self.users)
+
+    def refresh(self):
+        with self.lock.shared():
+            self._refresh()
+
+    def _refresh(self):
+        if self.store is not None:
+            if not self._tasks_current():
+                # tasks.txt was rewritten, e.g. by a compaction, or patched
+                self._load_store()
+            else:
+                journal_size = self.journal.size()
+                if journal_size < self._journal_offset:
+                    self._load_store()
+                elif journal_size > self._journal_offset:
+                    # Only the records added since the last replay are read
+                    self._replay_journal(self._journal_offset)
+
+        if self.users is not None and file_identity(self.users_path) != self._users_identity:
+            self._load_users()
+
+    def data_version(self):
+        # tasks.txt is replaced on every compaction and patched in place
+        # otherwise, and the journal only grows in between
+        with self.lock.shared():
+            return (file_identity(self.tasks_path), self.journal.size(), read_patch_count(self.patch_count_path))
+
+    def _tasks_current(self):
+        # True if tasks.txt is still the version the store was loaded from
+        return (file_identity(self.tasks_path) == self._tasks_identity
+                and read_patch_count(self.patch_count_path) == self._patch_count)
+
+    @contextmanager
+    def locked(self):
+        with self.lock.exclusive():
+            self._refresh()
+            yield
+
+    def write_users_to_file(self, username_dict):
+        '''
+        Function to write username to file
+
+        Input: dictionary of username-password key-value pairs
+        '''
+        tmp_path = self.users_path + ".tmp"
+        with open(tmp_path, "w") as out_file:
+            user_data = []
+            for k in username_dict:
+                user_data.append(f"{k};{username_dict[k]}")
+            out_file.write("\n".join(user_data))
+            out_file.flush()
+            os.fsync(out_file.fileno())
+        os.replace(tmp_path, self.users_path)
+        self._users_identity = file_identity(self.users_path)
+
+    def write_tasks_to_file(self, tasks):
+        '''
+        Writes a full snapshot of the tasks to tasks.txt
+
+        The snapshot goes to a temporary file first and then replaces tasks.txt,
+        so a crash part way through never leaves a truncated tasks.txt behind.
+        '''
+        tmp_path = self.tasks_path + ".tmp"
+        with open(tmp_path, "w") as task_file:
+            separator = ""
+            for t in tasks:
+                task_file.write(separator + t.to_string())
+                separator = "\n"
+            task_file.flush()
+            os.fsync(task_file.fileno())
+        os.replace(tmp_path, self.tasks_path)
+        self._tasks_identity = file_identity(self.tasks_path)
+
+    def compact(self):
+        '''
+        Folds the journal back into tasks.txt
+        '''
+        with self.locked():
+            self.write_tasks_to_file(self.store)
+            self.journal.clear()
+            self._journal_offset = 0
+
+    def _patch_tasks(self, tasks):
+        # Writes updated tasks over their lines in tasks.txt if every line
+        # keeps its length. Returns False if tasks.txt must be rewritten.
+        if self.journal.size() > 0:
+            return False
+        if self.line_index is None or not self.line_index.is_current():
+            self.line_index = LineIndex.scan(self.tasks_path)
+        changes = [(t.task_number, t.to_string().encode("utf-8")) for t in tasks]
+        if not all(self.line_index.fits(task_number, line) for task_number, line in changes):
+            return False
+        self.line_index.patch(changes)
+        self._tasks_identity = self.line_index.identity
+        self._patch_count += 1
+        write_patch_count(self.patch_count_path, self._patch_count)
+        return True
+
+    def _save_tasks(self, tasks, op):
+        # In journal mode the tasks are appended to the journal, which is
+        # compacted into tasks.txt once it grows past COMPACT_SIZE.
+        # Otherwise updates that keep the length of their lines are patched
+        # into tasks.txt, and any other change rewrites the whole file.
+        with self.locked():
+            if self.journal_mode:
+                self._journal_offset = self.journal.append_many(op, [t.to_string() for t in tasks])
+                if self._journal_offset > COMPACT_SIZE:
+                    self.compact()
+            elif op != UPDATE or not self._patch_tasks(tasks):
+                self.compact()
+
+    def add_task(self, task):
+        self._save_tasks([task], ADD)
+
+    def update_task(self, task):
+        self._save_tasks([task], UPDATE)
+
+    def add_tasks(self, tasks):
+        # The whole batch goes to the journal in one write, or to one
+        # rewrite of tasks.txt when not journaling
+        self._save_tasks(tasks, ADD)
+
+    def remove_tasks(self, task_numbers):
+        # The journal only records additions and updates, so removing
+        # rewrites tasks.txt without the tasks
+        with self.locked():
+            for task_number in task_numbers:
+                self.store.remove(task_number)
+            self.compact()
+
+    def add_user(self, username, password):
+        with self.locked():
+            self.users[username] = password
+            self.write_users_to_file(self.users)
+
+    def replace_all(self, tasks, users):
+        with self.lock.exclusive():
+            self.store = TaskStore(tasks)
+            self.users = dict(users)
+            self.write_tasks_to_file(self.store)
+            self.journal.clear()
+            self._journal_offset = 0
+            self.write_users_to_file(self.users)
+
+    def close(self):
+        # Journaled changes are left for the next start to replay. Folding
+        # them into tasks.txt here would make every other process reload all
+        # the tasks, so that only happens past COMPACT_SIZE or with
+        # "python storage.py compact".
+        # Leave a snapshot of tasks.txt for the next start, unless other
+        # processes have changed it since
+        if self.store is not None and self.snapshot_mode:
+            with self.lock.shared():
+                if (self.journal.size() == 0 and self._tasks_current()
+                        and not snapshot.is_current(self.tasks_path)):
+                    snapshot.save(self.tasks_path, self.store.snapshot_state())
+
+
+class SQLiteBackend(StorageBackend):
+    def __init__(self, path = DATABASE_FILE):
+        '''
+        Inputs:
+        path: String, location of the database file
+        '''
+        self.path = path
+        # Wait for other processes' write transactions rather than failing.
+        # The server writes from its writer thread, never at the same time
+        # as it reads.
+        self.conn = sqlite3.connect(path, timeout = 60, check_same_thread = False)
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    task_number TEXT NOT NULL UNIQUE,
+                    username TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    description TEXT NOT NULL,
+                    due_date TEXT NOT NULL,
+                    assigned_date TEXT NOT NULL,
+                    completed INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS tasks_username ON tasks (username);
+                CREATE INDEX IF NOT EXISTS tasks_completed ON tasks (completed);
+                CREATE INDEX IF NOT EXISTS tasks_due_date ON tasks (due_date);
+                CREATE TABLE IF NOT EXISTS users (
+                    username TEXT NOT NULL UNIQUE,
+                    password TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS meta (
+                    generation INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS removed_tasks (
+                    task_number TEXT NOT NULL,
+                    generation INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS removed_tasks_generation ON removed_tasks (generation);
+            """)
+            # Every change raises the generation and stamps the changed rows
+            # with it, so other processes can reload just those rows.
+            # Removed tasks leave a row in removed_tasks stamped the same way.
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(tasks)")]
+            if "generation" not in columns:
+                self.conn.execute("ALTER TABLE tasks ADD COLUMN generation INTEGER NOT NULL DEFAULT 0")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS tasks_generation ON tasks (generation)")
+            # Numbers new tasks without reading every row
+            self.conn.execute("CREATE INDEX IF NOT EXISTS tasks_number ON tasks (CAST(task_number AS INTEGER))")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS removed_tasks_number ON removed_tasks (CAST(task_number AS INTEGER))")
+            if self.conn.execute("SELECT COUNT(*) FROM meta").fetchone()[0] == 0:
+                self.conn.execute("INSERT INTO meta (generation) VALUES (0)")
+
+        # Generation and last user rowid loaded into memory
+        self.generation = 0
+        self._users_rowid = 0
+        self._lock_depth = 0
+
+    @staticmethod
+    def _task_row(task):
+        # Dates are stored as zero-padded ISO strings so they compare as text
+        return (
+            task.username,
+            task.title,
+            task.description,
+            format_date(task.due_date),
+            format_date(task.assigned_date),
+            1 if task.completed else 0,
+            task.task_number,
+        )
+
+    @staticmethod
+    def _row_task(row):
+        username, title, description, due_date, assigned_date, completed, task_number = row
+        return Task.from_fields(username, title, description, due_date, assigned_date, bool(completed), task_number)
+
+    _TASK_COLUMNS = "username, title, description, due_date, assigned_date, completed, task_number"
+
+    @contextmanager
+    def _read_snapshot(self):
+        # Runs several SELECTs against one consistent view of the database
+        if self.conn.in_transaction:
+            yield
+            return
+        self.conn.execute("BEGIN")
+        try:
+            yield
+        finally:
+            self.conn.commit()
+
+    def load_store(self):
+        with self._read_snapshot():
+            self.generation = self.conn.execute("SELECT generation FROM meta").fetchone()[0]
+            rows = self.conn.execute(f"SELECT {self._TASK_COLUMNS} FROM tasks ORDER BY rowid")
+            self.store = TaskStore(self._row_task(row) for row in rows)
+        return self.store
+
+    def load_users(self):
+        if self.conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0:
+            with self.locked():
+                if self.conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0:
+                    self.conn.executemany("INSERT INTO users (username, password) VALUES (?, ?)", DEFAULT_USERS.items())
+        self.users = {}
+        self._users_rowid = 0
+        self._load_new_users()
+        return self.users
+
+    def _load_new_users(self):
+        # Users are only ever added, so new ones have a higher rowid
+        rows = self.conn.execute(
+            "SELECT rowid, username, password FROM users WHERE rowid > ? ORDER BY rowid",
+            (self._users_rowid,),
+        )
+        for rowid, username, password in rows:
+            self.users[username] = password
+            self._users_rowid = rowid
+
+    def refresh(self):
+        with self._read_snapshot():
+            generation = self.conn.execute("SELECT generation FROM meta").fetchone()[0]
+            if self.store is not None and generation != self.generation:
+                rows = self.conn.execute(
+                    f"SELECT {self._TASK_COLUMNS} FROM tasks WHERE generation > ? ORDER BY rowid",
+                    (self.generation,),
+                )
+                for row in rows:
+                    self.store.add(self._row_task(row))
+                removed = self.conn.execute(
+                    "SELECT task_number FROM removed_tasks WHERE generation > ?",
+                    (self.generation,),
+                )
+                for (task_number,) in removed:
+                    self.store.remove(task_number)
+                self.generation = generation
+            if self.users is not None:
+                self._load_new_users()
+
+    @contextmanager
+    def locked(self):
+        # BEGIN IMMEDIATE takes SQLite's write lock for the whole block
+        if self._lock_depth == 0:
+            self.conn.execute("BEGIN IMMEDIATE")
+        self._lock_depth += 1
+        try:
+            if self._lock_depth == 1:
+                self.refresh()
+            yield
+        except BaseException:
+            self._lock_depth -= 1
+            if self._lock_depth == 0:
+                self.conn.rollback()
+            raise
+        self._lock_depth -= 1
+        if self._lock_depth == 0:
+            self.conn.commit()
+
+    def data_version(self):
+        # Every change raises the generation
+        return self.conn.execute("SELECT generation FROM meta").fetchone()[0]
+
+    def _next_generation(self):
+        self.conn.execute("UPDATE meta SET generation = generation + 1")
+        self.generation = self.conn.execute("SELECT generation FROM meta").fetchone()[0]
+        return self.generation
+
+    def add_task(self, task):
+        self.add_tasks([task])
+
+    def add_tasks(self, tasks):
+        # One transaction for the whole batch
+        with self.locked():
+            generation = self._next_generation()
+            self.conn.executemany(
+                f"INSERT INTO tasks ({self._TASK_COLUMNS}, generation) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._task_row(t) + (generation,) for t in tasks),
+            )
+
+    def update_task(self, task):
+        with self.locked():
+            generation = self._next_generation()
+            self.conn.execute(
+                """UPDATE tasks SET username = ?, title = ?, description = ?, due_date = ?,
+                   assigned_date = ?, completed = ?, generation = ? WHERE task_number = ?""",
+                self._task_row(task)[:-1] + (generation, task.task_number),
+            )
+
+    def remove_tasks(self, task_numbers):
+        with self.locked():
+            generation = self._next_generation()
+            for task_number in task_numbers:
+                self.store.remove(task_number)
+            self.conn.executemany("DELETE FROM tasks WHERE task_number = ?", ((n,) for n in task_numbers))
+            self.conn.executemany(
+                "INSERT INTO removed_tasks (task_number, generation) VALUES (?, ?)",
+                ((n, generation) for n in task_numbers),
+            )
+
+    def add_user(self, username, password):
+        with self.locked():
+            self.conn.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, password))
+            if self.users is not None:
+                self._load_new_users()
+
+    def replace_all(self, tasks, users):
+        with self.locked():
+            generation = self._next_generation()
+            self.conn.execute("DELETE FROM tasks")
+            self.conn.execute("DELETE FROM users")
+            self.conn.executemany(
+                f"INSERT INTO tasks ({self._TASK_COLUMNS}, generation) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._task_row(t) + (generation,) for t in tasks),
+            )
+            self.conn.executemany("INSERT INTO users (username, password) VALUES (?, ?)", users.items())
+
+    def report_counts(self, today = None):
+        '''
+        Counts completed, pending and overdue tasks per user with one
+        grouped query over the username index
+        '''
+        if today is None:
+            today = date.today()
+        today_str = format_date(today)
+
+        totals = [0, 0, 0]
+        per_user = {}
+        rows = self.conn.execute(
+            """SELECT username,
+                      SUM(completed),
+                      SUM(completed = 0 AND due_date >= ?),
+                      SUM(completed = 0 AND due_date < ?)
+               FROM tasks GROUP BY username""",
+            (today_str, today_str),
+        )
+        for username, completed, pending, overdue in rows:
+            per_user[username] = [completed, pending, overdue]
+            totals[0] += completed
+            totals[1] += pending
+            totals[2] += overdue
+        return totals, per_user
+
+    def tasks_for_user(self, username):
+        return self.query_tasks(username)
+
+    def get_task(self, task_number):
+        # Looked up through the task_number index unless the tasks are loaded
+        if self.store is not None:
+            return super().get_task(task_number)
+        row = self.conn.execute(
+            f"SELECT {self._TASK_COLUMNS} FROM tasks WHERE task_number = ?", (str(task_number),)
+        ).fetchone()
+        return None if row is None else self._row_task(row)
+
+    def next_task_number(self):
+        # Removed tasks' numbers are not given out again either
+        row = self.conn.execute(
+            """SELECT MAX(number) FROM (
+                   SELECT MAX(CAST(task_number AS INTEGER)) AS number FROM tasks
+                   UNION ALL
+                   SELECT MAX(CAST(task_number AS INTEGER)) FROM removed_tasks
+               )"""
+        ).fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def query_tasks(self, username = None, completed = None, due_from = None, due_to = None):
+        # The filters become one query over the indexed columns, so the
+        # tasks do not have to be loaded
+        conditions = []
+        parameters = []
+        if username is not None:
+            conditions.append("username = ?")
+            parameters.append(username)
+        if completed is not None:
+            conditions.append("completed = ?")
+            parameters.append(1 if completed else 0)
+        if due_from is not None:
+            conditions.append("due_date >= ?")
+            parameters.append(format_date(due_from))
+        if due_to is not None:
+            conditions.append("due_date <= ?")
+            parameters.append(format_date(due_to))
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        rows = self.conn.execute(f"SELECT {self._TASK_COLUMNS} FROM tasks{where} ORDER BY rowid", parameters)
+        return [self._row_task(row) for row in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+BACKENDS = {
+    "flat": FlatFileBackend,
+    "sqlite": SQLiteBackend,
+}
+
+def open_backend(name):
+    '''
+    Creates the backend with the given name ("flat" or "sqlite")
+    '''
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown storage backend '{name}', choose from: {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
+
+def migrate(source, destination):
+    '''
+    Copies every task and user from one backend to another
+    '''
+    store = source.load_store()
+    users = source.load_users()
+    destination.replace_all(store, users)
+    return len(store), len(users)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move task manager data between storage backends or compact it.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = subparsers.add_parser("migrate", help="copy all tasks and users to another backend")
+    migrate_parser.add_argument("source", choices=BACKENDS)
+    migrate_parser.add_argument("destination", choices=BACKENDS)
+    subparsers.add_parser("compact", help="fold tasks.journal into tasks.txt")
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        backend = FlatFileBackend()
+        backend.load_store()
+        backend.compact()
+        backend.close()
+        print(f"Folded {backend.journal.path} into {backend.tasks_path}.")
+        return
+
+    if args.source == args.destination:
+        parser.error("source and destination must be different backends")
+
+    source = open_backend(args.source)
+    destination = open_backend(args.destination)
+    num_tasks, num_users = migrate(source, destination)
+    source.close()
+    destination.close()
+    print(f"Migrated {num_tasks} tasks and {num_users} users from {args.source} to {args.destination}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+'''
+In-memory task store for task_manager.py
+
+TaskStore owns the Task objects and keeps secondary indexes so that looking
+up a user's tasks, a task by its number or the tasks with a given completion
+status only touches the matching tasks. It also keeps running totals of
+completed, pending and overdue tasks so statistics need no pass over the tasks.
+
+Incomplete tasks are also kept ordered by due date, overall and per user, so
+overdue and upcoming tasks are found with a binary search. This index is
+built the first time it is needed and kept up to date from then on.
+'''
+from bisect import bisect_left, insort
+from datetime import date, timedelta
+
+from report import classify, STATUS_INDEX
+from task import Task
+
+# Bits of a due date index key that hold the task number
+NUMBER_BITS = 40
+NUMBER_MASK = (1 << NUMBER_BITS) - 1
+
+
+class TaskStore:
+    def __init__(self, tasks = ()):
+        '''
+        Inputs:
+        tasks: iterable of Task objects, in the order they appear in tasks.txt
+        '''
+        # task_number -> Task, kept in insertion order
+        self.tasks = {}
+        # username -> task numbers (dicts used as ordered sets)
+        self.by_user = {}
+        # completed (Boolean) -> task numbers
+        self.by_status = {True: {}, False: {}}
+
+        # Running [completed, pending, overdue] counts, overall and per user,
+        # classified against stats_date
+        self.stats_date = date.today()
+        self.totals = [0, 0, 0]
+        self.user_counts = {}
+        # Goes up by one on every change so callers can tell when to refresh
+        self.version = 0
+        # Highest task number ever added, which stays taken after its task
+        # is removed
+        self.last_task_number = -1
+
+        # Incomplete tasks as sorted due date keys (see _due_key), overall
+        # and per user. None until first used.
+        self._due_index = None
+        self._due_by_user = None
+
+        for task in tasks:
+            self.add(task)
+
+    def snapshot_state(self):
+        '''
+        Returns the tasks, one list per field, and the indexes as plain
+        values that snapshot.py can save
+        '''
+        tasks = self.tasks.values()
+        columns = (
+            [t.username for t in tasks],
+            [t.title for t in tasks],
+            [t.description for t in tasks],
+            [t.due_date_string() for t in tasks],
+            [t.assigned_date_string() for t in tasks],
+            [bool(t.completed) for t in tasks],
+            [t.task_number for t in tasks],
+        )
+        return (columns, self.by_user, self.by_status, self.stats_date.toordinal(),
+                self.totals, self.user_counts, self.last_task_number)
+
+    @classmethod
+    def from_snapshot_state(cls, state):
+        '''
+        Rebuilds a store from the output of snapshot_state() without
+        indexing the tasks again
+        '''
+        columns, by_user, by_status, stats_ordinal, totals, user_counts, last_task_number = state
+        store = cls()
+        store.tasks = dict(zip(columns[-1], Task.from_columns(*columns)))
+        store.by_user = by_user
+        store.by_status = by_status
+        store.stats_date = date.fromordinal(stats_ordinal)
+        store.totals = totals
+        store.user_counts = user_counts
+        store.last_task_number = last_task_number
+        store.version = len(store.tasks)
+        return store
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def __iter__(self):
+        return iter(self.tasks.values())
+
+    def __contains__(self, task_number):
+        return task_number in self.tasks
+
+    def _count(self, task, change):
+        status = STATUS_INDEX[classify(task, self.stats_date)]
+        self.totals[status] += change
+        user_counts = self.user_counts.get(task.username)
+        if user_counts is None:
+            user_counts = self.user_counts[task.username] = [0, 0, 0]
+        user_counts[status] += change
+
+    @staticmethod
+    def _due_key(task):
+        # The due date ordinal and the task number packed into one integer,
+        # which sorts by due date and then task number and compares quickly
+        return (task.due_date.toordinal() << NUMBER_BITS) | int(task.task_number)
+
+    def _index(self, task):
+        self.by_user.setdefault(task.username, {})[task.task_number] = None
+        self.by_status[bool(task.completed)][task.task_number] = None
+        self._count(task, 1)
+        if self._due_index is not None and not task.completed:
+            key = self._due_key(task)
+            insort(self._due_index, key)
+            insort(self._due_by_user.setdefault(task.username, []), key)
+        self.version += 1
+
+    def _unindex(self, task):
+        user_tasks = self.by_user[task.username]
+        del user_tasks[task.task_number]
+        if not user_tasks:
+            del self.by_user[task.username]
+        del self.by_status[bool(task.completed)][task.task_number]
+        self._count(task, -1)
+        if self._due_index is not None and not task.completed:
+            key = self._due_key(task)
+            del self._due_index[bisect_left(self._due_index, key)]
+            user_keys = self._due_by_user[task.username]
+            del user_keys[bisect_left(user_keys, key)]
+            if not user_keys:
+                del self._due_by_user[task.username]
+
+    def add(self, task):
+        '''
+        Adds a task, replacing any stored task with the same task number
+        '''
+        old_task = self.tasks.get(task.task_number)
+        if old_task is not None:
+            self._unindex(old_task)
+        self.tasks[task.task_number] = task
+        self._index(task)
+        self.last_task_number = max(self.last_task_number, int(task.task_number))
+        return task
+
+    def remove(self, task_number):
+        '''
+        Removes a task and returns it, or None if there is no such task
+        '''
+        task = self.tasks.pop(str(task_number), None)
+        if task is not None:
+            self._unindex(task)
+            self.version += 1
+        return task
+
+    def get(self, task_number):
+        '''
+        Returns the task with the given number, or None
+        '''
+        return self.tasks.get(str(task_number))
+
+    def next_task_number(self):
+        '''
+        Task number to give the next new task
+
+        Numbers follow the highest number added so far, so the numbers of
+        removed tasks are not given out again.
+        '''
+        return str(self.last_task_number + 1)
+
+    def for_user(self, username):
+        '''
+        Returns the tasks assigned to a user
+        '''
+        return [self.tasks[n] for n in self.by_user.get(username, ())]
+
+    def with_status(self, completed):
+        '''
+        Returns the completed (True) or incomplete (False) tasks
+        '''
+        return [self.tasks[n] for n in self.by_status[bool(completed)]]
+
+    def query(self, username = None, completed = None, due_from = None, due_to = None):
+        '''
+        Yields the tasks matching every filter given, in store order
+
+        Inputs:
+        username: String, only this user's tasks
+        completed: Boolean, only completed (True) or incomplete (False) tasks
+        due_from, due_to: dates, only tasks due on or between these days
+        '''
+        # Starts from the smallest index that applies
+        numbers = None
+        if username is not None:
+            numbers = self.by_user.get(username, {})
+        if completed is not None:
+            status_numbers = self.by_status[bool(completed)]
+            if numbers is None or len(status_numbers) < len(numbers):
+                numbers = status_numbers
+        candidates = self.tasks.values() if numbers is None else (self.tasks[n] for n in numbers)
+
+        for task in candidates:
+            if username is not None and task.username != username:
+                continue
+            if completed is not None and bool(task.completed) != completed:
+                continue
+            if due_from is not None and task.due_date < due_from:
+                continue
+            if due_to is not None and task.due_date > due_to:
+                continue
+            yield task
+
+    def _build_due_index(self):
+        if self._due_index is None:
+            self._due_by_user = {}
+            for task_number in self.by_status[False]:
+                task = self.tasks[task_number]
+                self._due_by_user.setdefault(task.username, []).append(self._due_key(task))
+            for keys in self._due_by_user.values():
+                keys.sort()
+            self._due_index = [key for keys in self._due_by_user.values() for key in keys]
+            self._due_index.sort()
+
+    def _due_between(self, keys, first, last):
+        # Tasks for keys due on days first to last, as ordinals (None for no limit)
+        start = 0 if first is None else bisect_left(keys, first << NUMBER_BITS)
+        end = len(keys) if last is None else bisect_left(keys, (last + 1) << NUMBER_BITS)
+        return [self.tasks[str(key & NUMBER_MASK)] for key in keys[start:end]]
+
+    def overdue(self, today = None, username = None):
+        '''
+        Returns the incomplete tasks due before today, earliest first
+
+        Inputs:
+        username: String, only this user's tasks
+        '''
+        if today is None:
+            today = date.today()
+        self._build_due_index()
+        keys = self._due_index if username is None else self._due_by_user.get(username, [])
+        return self._due_between(keys, None, today.toordinal() - 1)
+
+    def due_within(self, days, today = None, username = None):
+        '''
+        Returns the incomplete tasks due from today to the given number of
+        days ahead, earliest first
+
+        Inputs:
+        username: String, only this user's tasks
+        '''
+        if today is None:
+            today = date.today()
+        self._build_due_index()
+        keys = self._due_index if username is None else self._due_by_user.get(username, [])
+        return self._due_between(keys, today.toordinal(), (today + timedelta(days=days)).toordinal())
+
+    def next_due(self, today = None):
+        '''
+        Returns a dictionary of each user's next incomplete task due today
+        or later, for the users that have one
+        '''
+        if today is None:
+            today = date.today()
+        self._build_due_index()
+        first = today.toordinal() << NUMBER_BITS
+        next_tasks = {}
+        for username, keys in self._due_by_user.items():
+            i = bisect_left(keys, first)
+            if i < len(keys):
+                next_tasks[username] = self.tasks[str(keys[i] & NUMBER_MASK)]
+        return next_tasks
+
+    def complete(self, task_number):
+        '''
+        Marks a task as complete and returns it
+        '''
+        task = self.tasks[str(task_number)]
+        self._unindex(task)
+        task.completed = True
+        self._index(task)
+        return task
+
+    def reassign(self, task_number, username):
+        '''
+        Assigns a task to another user and returns it
+        '''
+        task = self.tasks[str(task_number)]
+        self._unindex(task)
+        task.username = username
+        self._index(task)
+        return task
+
+    def set_due_date(self, task_number, due_date):
+        '''
+        Changes the due date of a task and returns it
+        '''
+        task = self.tasks[str(task_number)]
+        self._unindex(task)
+        task.due_date = due_date
+        self._index(task)
+        return task
+
+    def stats(self, today = None):
+        '''
+        Returns the running (totals, per_user) counts in the same form as
+        report.aggregate()
+
+        Overdue status depends on the date. When the day moves forward only
+        the tasks that became overdue since are found, through the due date
+        index, and counted again. If the date moves back the counts are
+        rebuilt, and otherwise they are returned as they are.
+        '''
+        if today is None:
+            today = date.today()
+        if today > self.stats_date:
+            self._build_due_index()
+            became_overdue = self._due_between(self._due_index, self.stats_date.toordinal(), today.toordinal() - 1)
+            for task in became_overdue:
+                self._count(task, -1)
+            self.stats_date = today
+            for task in became_overdue:
+                self._count(task, 1)
+            self.version += 1
+        elif today != self.stats_date:
+            self.stats_date = today
+            self.totals = [0, 0, 0]
+            self.user_counts = {}
+            for task in self.tasks.values():
+                self._count(task, 1)
+            self.version += 1
+        return self.totals, self.user_counts
@@ -0,0 +1,198 @@
+'''
+Task record for task_manager.py
+
+Tasks keep their fields in __slots__ instead of a per-object __dict__, and
+keep the due and assigned dates as the raw strings from tasks.txt until the
+dates are first needed. Usernames and date strings repeat across many tasks,
+so they are interned and every task with the same value shares one string.
+'''
+import sys
+from datetime import datetime, date
+from functools import lru_cache
+
+DATETIME_STRING_FORMAT = "%Y-%m-%d"
+
+
+@lru_cache(maxsize=4096)
+def parse_date(date_str):
+    '''
+    Converts a YYYY-MM-DD string to a date
+
+    Uses date.fromisoformat() and only falls back to strptime for dates that
+    are not zero-padded, such as 2023-1-5. Results are cached because the
+    same few hundred dates come up again and again.
+    '''
+    try:
+        return date.fromisoformat(date_str)
+    except ValueError:
+        return datetime.strptime(date_str, DATETIME_STRING_FORMAT).date()
+
+def read_tasks(path):
+    '''
+    Yields a Task for each line of a tasks file
+
+    The file is read line by line through a buffered handle, so only one line
+    is held in memory at a time whatever the size of the file.
+    '''
+    with open(path, "r") as task_file:
+        for line in task_file:
+            line = line.rstrip("\n")
+            if line != "":
+                yield Task.from_string(line)
+
+def format_date(date_value):
+    '''
+    Converts a date to a YYYY-MM-DD string
+    '''
+    return date_value.strftime(DATETIME_STRING_FORMAT)
+
+def _as_date(value):
+    # Datetimes are stored as plain dates so that all dates compare
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+class Task:
+    __slots__ = (
+        "username",
+        "title",
+        "description",
+        "completed",
+        "task_number",
+        "_due_date",
+        "_assigned_date",
+        "_due_str",
+        "_assigned_str",
+    )
+
+    def __init__(self, username = None, title = None, description = None, due_date = None, assigned_date = None, completed = None, task_number = None):
+        '''
+        Inputs:
+        username: String
+        title: String
+        description: String
+        due_date: Date
+        assigned_date: Date
+        completed: Boolean
+        task_number: String
+        '''
+        self.username = username
+        self.title = title
+        self.description = description
+        self.due_date = due_date
+        self.assigned_date = assigned_date
+        self.completed = completed
+        self.task_number = task_number
+
+    @classmethod
+    def from_string(cls, task_str):
+        '''
+        Convert from string in tasks.txt to object
+
+        The dates are only parsed when they are first read.
+        '''
+        tasks = task_str.split(";")
+        return cls.from_fields(tasks[0], tasks[1], tasks[2], tasks[3], tasks[4], tasks[5] == "Yes", tasks[6])
+
+    @classmethod
+    def from_fields(cls, username, title, description, due_str, assigned_str, completed, task_number):
+        '''
+        Builds a task from stored field values, with the dates as YYYY-MM-DD strings
+        '''
+        task = cls.__new__(cls)
+        task.username = sys.intern(username)
+        task.title = title
+        task.description = description
+        task._due_str = sys.intern(due_str)
+        task._due_date = None
+        task._assigned_str = sys.intern(assigned_str)
+        task._assigned_date = None
+        task.completed = completed
+        task.task_number = task_number
+        return task
+
+    @classmethod
+    def from_columns(cls, usernames, titles, descriptions, due_strs, assigned_strs, completed, task_numbers):
+        '''
+        Builds a list of tasks from lists of stored field values, one list
+        per field, as kept in a snapshot (see snapshot.py)
+
+        The strings are used as they are, without interning them again.
+        '''
+        new = cls.__new__
+        tasks = []
+        append = tasks.append
+        for fields in zip(usernames, titles, descriptions, due_strs, assigned_strs, completed, task_numbers):
+            task = new(cls)
+            (task.username, task.title, task.description, task._due_str,
+             task._assigned_str, task.completed, task.task_number) = fields
+            task._due_date = None
+            task._assigned_date = None
+            append(task)
+        return tasks
+
+    @property
+    def due_date(self):
+        if self._due_date is None and self._due_str is not None:
+            self._due_date = parse_date(self._due_str)
+        return self._due_date
+
+    @due_date.setter
+    def due_date(self, value):
+        self._due_date = _as_date(value)
+        self._due_str = None
+
+    @property
+    def assigned_date(self):
+        if self._assigned_date is None and self._assigned_str is not None:
+            self._assigned_date = parse_date(self._assigned_str)
+        return self._assigned_date
+
+    @assigned_date.setter
+    def assigned_date(self, value):
+        self._assigned_date = _as_date(value)
+        self._assigned_str = None
+
+    def due_date_string(self):
+        '''
+        Due date as stored in tasks.txt, without parsing it
+        '''
+        if self._due_str is not None:
+            return self._due_str
+        return format_date(self._due_date)
+
+    def assigned_date_string(self):
+        '''
+        Assigned date as stored in tasks.txt, without parsing it
+        '''
+        if self._assigned_str is not None:
+            return self._assigned_str
+        return format_date(self._assigned_date)
+
+    def to_string(self):
+        '''
+        Convert to string for storage in tasks.txt
+        '''
+        str_attrs = [
+            self.username,
+            self.title,
+            self.description,
+            self.due_date_string(),
+            self.assigned_date_string(),
+            "Yes" if self.completed else "No",
+            self.task_number
+        ]
+        return ";".join(str_attrs)
+
+    def display(self):
+        '''
+        Display object in readable format
+        '''
+        disp_str = f"Task number: \t {self.task_number}\n"
+        disp_str += f"Task: \t\t {self.title}\n"
+        disp_str += f"Assigned to: \t {self.username}\n"
+        disp_str += f"Date Assigned: \t {format_date(self.assigned_date)}\n"
+        disp_str += f"Due Date: \t {format_date(self.due_date)}\n"
+        disp_str += f"Task Description: \n{self.description}\n"
+        return disp_str
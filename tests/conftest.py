@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    '''
+    Runs the test in an empty temporary directory, where the task files
+    are created by default
+    '''
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,55 @@
+from journal import TaskJournal, ADD, UPDATE
+
+
+def test_replay_returns_records_in_order(data_dir):
+    journal = TaskJournal()
+    journal.append_many(ADD, ["a;t;d;2030-01-01;2024-01-01;No;0", "b;t;d;2030-01-01;2024-01-01;No;1"])
+    journal.append(UPDATE, "a;t;d;2030-01-01;2024-01-01;Yes;0")
+    end = journal.size()
+
+    assert list(journal.replay()) == [
+        (ADD, "a;t;d;2030-01-01;2024-01-01;No;0"),
+        (ADD, "b;t;d;2030-01-01;2024-01-01;No;1"),
+        (UPDATE, "a;t;d;2030-01-01;2024-01-01;Yes;0"),
+    ]
+    assert journal.end_offset == end
+
+
+def test_replay_from_offset_returns_only_later_records(data_dir):
+    journal = TaskJournal()
+    offset = journal.append_many(ADD, ["a;t;d;2030-01-01;2024-01-01;No;0"])
+    journal.append_many(ADD, ["b;t;d;2030-01-01;2024-01-01;No;1"])
+
+    assert list(journal.replay(offset)) == [(ADD, "b;t;d;2030-01-01;2024-01-01;No;1")]
+
+
+def test_replay_skips_torn_record(data_dir):
+    journal = TaskJournal()
+    end = journal.append_many(ADD, ["a;t;d;2030-01-01;2024-01-01;No;0"])
+    with open(journal.path, "ab") as journal_file:
+        journal_file.write(b"add;b;t;d;2030-01")
+
+    assert list(journal.replay()) == [(ADD, "a;t;d;2030-01-01;2024-01-01;No;0")]
+    assert journal.end_offset == end
+
+
+def test_append_trims_torn_record_first(data_dir):
+    journal = TaskJournal()
+    journal.append_many(ADD, ["a;t;d;2030-01-01;2024-01-01;No;0"])
+    with open(journal.path, "ab") as journal_file:
+        journal_file.write(b"add;b;t;d;2030-01")
+    journal.append_many(ADD, ["c;t;d;2030-01-01;2024-01-01;No;1"])
+
+    assert list(journal.replay()) == [
+        (ADD, "a;t;d;2030-01-01;2024-01-01;No;0"),
+        (ADD, "c;t;d;2030-01-01;2024-01-01;No;1"),
+    ]
+
+
+def test_append_trims_journal_that_is_only_a_torn_record(data_dir):
+    journal = TaskJournal()
+    with open(journal.path, "wb") as journal_file:
+        journal_file.write(b"add;a;t")
+    journal.append_many(ADD, ["b;t;d;2030-01-01;2024-01-01;No;0"])
+
+    assert list(journal.replay()) == [(ADD, "b;t;d;2030-01-01;2024-01-01;No;0")]
@@ -0,0 +1,64 @@
+import copy
+from datetime import date
+
+import pytest
+
+import storage
+from manager import TaskManager
+
+TODAY = date(2026, 6, 1)
+
+
+def open_manager(backend_name):
+    return TaskManager(storage.open_backend(backend_name), auto_archive_days=None)
+
+
+@pytest.mark.parametrize("backend_name", sorted(storage.BACKENDS))
+def test_task_numbers_not_reused_after_archiving(data_dir, backend_name):
+    manager = open_manager(backend_name)
+    for title in ("First", "Second", "Third"):
+        manager.add_task("admin", title, "d", "2026-01-01")
+    # The highest numbered tasks are archived, leaving only task 0
+    manager.complete_task(1)
+    manager.complete_task(2)
+    archived = manager.archive_completed(30, TODAY)
+    assert [task.task_number for task in archived] == ["1", "2"]
+
+    task = manager.add_task("admin", "Fourth", "d", "2030-01-01")
+    assert task.task_number == "3"
+    manager.close()
+
+    restarted = open_manager(backend_name)
+    assert [t.task_number for t in restarted.all_tasks()] == ["0", "3"]
+    assert restarted.add_task("admin", "Fifth", "d", "2030-01-01").task_number == "4"
+    restarted.close()
+
+
+@pytest.mark.parametrize("backend_name", sorted(storage.BACKENDS))
+def test_archived_tasks_still_counted(data_dir, backend_name):
+    manager = open_manager(backend_name)
+    manager.add_task("admin", "Old", "d", "2026-01-01")
+    manager.add_task("admin", "New", "d", "2030-01-01")
+    manager.complete_task(0)
+    # The store's running totals are returned as they are, so they are copied
+    before = copy.deepcopy(manager.report_counts(TODAY))
+    manager.archive_completed(30, TODAY)
+
+    assert manager.report_counts(TODAY) == before
+    manager.close()
+
+
+def test_statistics_rewritten_after_change_by_other_process(data_dir):
+    first = open_manager("flat")
+    first.add_task("admin", "Task", "d", "2030-01-01")
+    first.statistics()
+    other = open_manager("flat")
+    other.complete_task(0)
+    # Folding the journal rebuilds the store when the first manager refreshes
+    other.backend.compact()
+    other.close()
+
+    task_overview, _ = first.statistics()
+    with open("task_overview.txt") as overview_file:
+        assert overview_file.read() == task_overview
+    assert "completed tasks: \t\t 1" in task_overview
@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+
+import pytest
+
+import rollup
+from rollup import RollupLog
+
+START = date(2024, 1, 1)
+
+
+@pytest.fixture
+def small_scans(monkeypatch):
+    # Makes the binary search do most of the work on a small file
+    monkeypatch.setattr(rollup, "SCAN_BYTES", 64)
+
+def record_days(log, days):
+    for day in range(days):
+        log.record(START + timedelta(days=day), [day, 1, 2], {"bob": [day, 0, 1], "sue": [0, day % 3, 0]})
+
+
+def test_trend_matches_every_recorded_day(data_dir, small_scans):
+    log = RollupLog()
+    record_days(log, 200)
+
+    for first, last in ((0, 199), (37, 90), (150, 150), (199, 250)):
+        days = log.trend(START + timedelta(days=first), START + timedelta(days=last))
+        expected = [(START + timedelta(days=day), [day, 1, 2]) for day in range(first, min(last, 199) + 1)]
+        assert days == expected
+
+
+def test_trend_for_one_user_leaves_out_days_without_tasks(data_dir, small_scans):
+    log = RollupLog()
+    record_days(log, 30)
+
+    days = log.trend(START, START + timedelta(days=29), "sue")
+    assert [day for day, _ in days] == [START + timedelta(days=n) for n in range(30) if n % 3]
+    assert log.trend(START, START + timedelta(days=29), "nobody") == []
+
+
+def test_trend_before_first_day_is_empty(data_dir, small_scans):
+    log = RollupLog()
+    record_days(log, 10)
+
+    assert log.trend(START - timedelta(days=30), START - timedelta(days=1)) == []
+
+
+def test_record_replaces_same_day(data_dir, small_scans):
+    log = RollupLog()
+    record_days(log, 50)
+    last = START + timedelta(days=49)
+    log.record(last, [7, 7, 7], {"bob": [7, 7, 7]})
+
+    assert log.trend(last, last) == [(last, [7, 7, 7])]
+    assert log.trend(last, last, "sue") == []
+    assert len(log.trend(START, last)) == 50
+
+
+def test_record_refuses_earlier_day(data_dir):
+    log = RollupLog()
+    record_days(log, 5)
+
+    assert not log.record(START, [0, 0, 0], {})
+    assert log.trend(START, START) == [(START, [0, 1, 2])]
+
+
+def test_torn_row_is_dropped(data_dir, small_scans):
+    log = RollupLog()
+    record_days(log, 20)
+    with open(log.path, "ab") as rollup_file:
+        rollup_file.write(b"2024-01-21;;5;5")
+
+    assert len(log.trend(START, START + timedelta(days=30))) == 20
+    log.record(START + timedelta(days=20), [5, 5, 5], {})
+    assert log.trend(START + timedelta(days=20), START + timedelta(days=20)) == [(START + timedelta(days=20), [5, 5, 5])]
@@ -0,0 +1,61 @@
+import os
+
+import snapshot
+
+
+def write_source(path, text):
+    with open(path, "w") as source_file:
+        source_file.write(text)
+
+
+def test_load_returns_saved_value_while_file_unchanged(data_dir):
+    write_source("tasks.txt", "a;b\n")
+    snapshot.save("tasks.txt", ["a", "b"])
+
+    assert snapshot.is_current("tasks.txt")
+    assert snapshot.load("tasks.txt") == ["a", "b"]
+    assert snapshot.load("tasks.txt", len) == 2
+
+
+def test_snapshot_ignored_after_file_changes_size(data_dir):
+    write_source("tasks.txt", "a;b\n")
+    snapshot.save("tasks.txt", ["a", "b"])
+    write_source("tasks.txt", "a;b;c\n")
+
+    assert not snapshot.is_current("tasks.txt")
+    assert snapshot.load("tasks.txt") is None
+
+
+def test_snapshot_ignored_after_same_size_change_with_same_timestamp(data_dir):
+    write_source("tasks.txt", "a;b\n")
+    before = os.stat("tasks.txt")
+    snapshot.save("tasks.txt", ["a", "b"])
+    write_source("tasks.txt", "a;c\n")
+    os.utime("tasks.txt", ns=(before.st_atime_ns, before.st_mtime_ns))
+
+    # Written within RACY_NS of the change, so the contents are hashed
+    assert snapshot.load("tasks.txt") is None
+
+
+def test_snapshot_ignored_after_format_change(data_dir, monkeypatch):
+    write_source("tasks.txt", "a;b\n")
+    snapshot.save("tasks.txt", ["a", "b"])
+    monkeypatch.setattr(snapshot, "FORMAT_VERSION", snapshot.FORMAT_VERSION + 1)
+
+    assert snapshot.load("tasks.txt") is None
+
+
+def test_damaged_snapshot_ignored(data_dir):
+    write_source("tasks.txt", "a;b\n")
+    snapshot.save("tasks.txt", ["a", "b"])
+    with open(snapshot.snapshot_path("tasks.txt"), "r+b") as snapshot_file:
+        snapshot_file.truncate(os.path.getsize(snapshot.snapshot_path("tasks.txt")) - 3)
+
+    assert snapshot.load("tasks.txt") is None
+
+
+def test_missing_snapshot(data_dir):
+    write_source("tasks.txt", "a;b\n")
+
+    assert not snapshot.is_current("tasks.txt")
+    assert snapshot.load("tasks.txt") is None
@@ -0,0 +1,87 @@
+import os
+
+from manager import TaskManager
+from storage import FlatFileBackend
+
+TASKS = [
+    "admin;First;d1;2030-01-01;2024-01-01;No;0",
+    "bob;Second;d2;2030-02-01;2024-01-01;No;1",
+]
+
+
+def write_data(data_dir):
+    (data_dir / "tasks.txt").write_text("\n".join(TASKS))
+    (data_dir / "user.txt").write_text("admin;password\nbob;pw")
+
+def open_manager(journal_mode = True):
+    # Each manager stands for a separate process sharing the files
+    return TaskManager(FlatFileBackend(journal_mode=journal_mode, snapshot_mode=False), auto_archive_days=None)
+
+def stored(manager):
+    return sorted(task.to_string() for task in manager.all_tasks())
+
+
+def test_refresh_replays_only_new_journal_records(data_dir):
+    write_data(data_dir)
+    reader = open_manager()
+    store = reader.store
+    writer = open_manager()
+    writer.add_task("bob", "Third", "d3", "2030-03-01")
+    writer.close()
+
+    # The journal is left in place on close, and replayed into the same store
+    assert os.path.getsize("tasks.journal") > 0
+    assert reader.store is store
+    assert stored(reader) == stored(open_manager())
+    assert len(reader.store) == 3
+
+
+def test_refresh_after_compaction_reloads(data_dir):
+    write_data(data_dir)
+    reader = open_manager()
+    version = reader.store.version
+    writer = open_manager()
+    writer.complete_task(1)
+    writer.backend.compact()
+
+    assert reader.get_task(1).completed
+    assert reader.store.version > version
+    assert stored(reader) == stored(open_manager())
+
+
+def test_refresh_sees_in_place_patch_with_unchanged_timestamp(data_dir):
+    write_data(data_dir)
+    reader = open_manager(journal_mode=False)
+    reader.store
+    before = os.stat("tasks.txt")
+    writer = open_manager(journal_mode=False)
+    writer.edit_task(0, due_date="2031-01-01")
+
+    # A file system with coarse timestamps can leave size and mtime unchanged
+    os.utime("tasks.txt", ns=(before.st_atime_ns, before.st_mtime_ns))
+    assert os.path.getsize("tasks.txt") == before.st_size
+
+    assert reader.get_task(0).due_date_string() == "2031-01-01"
+
+
+def test_restart_replays_journal(data_dir):
+    write_data(data_dir)
+    manager = open_manager()
+    task = manager.add_task("admin", "Third", "d3", "2030-03-01")
+    manager.complete_task(0)
+    manager.close()
+
+    restarted = open_manager()
+    assert restarted.get_task(task.task_number).title == "Third"
+    assert restarted.get_task(0).completed
+
+
+def test_user_reload_replaces_dictionary(data_dir):
+    write_data(data_dir)
+    reader = open_manager()
+    users = reader.users
+    open_manager().register_user("sue", "x")
+
+    assert "sue" in reader.users
+    # Lookups made with the old dictionary never see it half refilled
+    assert users == {"admin": "password", "bob": "pw"}